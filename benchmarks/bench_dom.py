@@ -0,0 +1,63 @@
+"""
+Compare the DOM backends of :mod:`xenopict.dom`.
+
+For each backend, reports the mean wall time per molecule to build a
+:class:`.Xenopict`, shade it, and serialize it with ``to_svg``, along with
+the peak memory (tracemalloc) of holding all the depictions at once.
+
+    PYTHONPATH=. python benchmarks/bench_dom.py [repeats]
+"""
+from __future__ import annotations
+
+import sys
+import time
+import tracemalloc
+
+from xenopict import Xenopict
+from xenopict.dom import BACKENDS
+
+SMILES = [
+    "CCO",
+    "O=C(O)Cc1ccccc1Nc1c(Cl)cccc1Cl",
+    "CN1C=NC2=C1C(=O)N(C(=O)N2C)C",
+    "CC(C)Cc1ccc(cc1)[C@@H](C)C(=O)O",
+    "CC1=C(C(=O)c2ccccc2C1=O)C/C=C(\\C)CCC[C@H](C)CCC[C@H](C)CCCC(C)C",
+    "C[C@H]1O[C@@H](O[C@H]2[C@@H](O)C[C@H](O[C@H]3[C@@H](O)C[C@H](O[C@H]4CC[C@]5(C)[C@H]6C[C@@H](O)[C@]7(C)[C@@H](C8=CC(=O)OC8)CC[C@]7(O)[C@@H]6CC[C@@H]5C4)O[C@@H]3C)O[C@@H]2C)C[C@@H](O)[C@@H]1O",
+]
+
+
+def _render(smiles: str, backend: str):
+    x = Xenopict(smiles, dom_backend=backend)
+    x.shade([0.5] * x.mol.GetNumAtoms())
+    x.to_svg()
+    return x
+
+
+def bench_time(backend: str, repeats: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeats):
+        for s in SMILES:
+            _render(s, backend)
+    return (time.perf_counter() - start) / (repeats * len(SMILES))
+
+
+def bench_memory(backend: str) -> int:
+    tracemalloc.start()
+    keep = [_render(s, backend) for s in SMILES]
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del keep
+    return peak
+
+
+def main(repeats: int = 20):
+    print(f"{'backend':<10}{'ms/molecule':>14}{'peak KiB':>12}")
+    for backend in BACKENDS:
+        _render(SMILES[0], backend)  # warm up
+        t = bench_time(backend, repeats)
+        m = bench_memory(backend)
+        print(f"{backend:<10}{t * 1000:>14.2f}{m / 1024:>12.0f}")
+
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:]))
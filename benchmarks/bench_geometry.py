@@ -0,0 +1,81 @@
+"""
+Scaling of substructure geometry with molecule size.
+
+Builds the skeleton of the whole molecule (as :meth:`.Xenopict.mark_substructure`
+does, with two-hop segments) for linear peptides of increasing size, and
+compares :meth:`.Xenopict._shapely_from_atoms` with the incremental union it
+replaced (only up to ~250 atoms, beyond which it takes minutes). Also reports
+the time of a full ``mark_substructure`` call.
+
+    PYTHONPATH=. python benchmarks/bench_geometry.py [repeats]
+"""
+from __future__ import annotations
+
+import sys
+import time
+from collections import defaultdict
+
+from shapely.geometry import LineString, Point
+
+from corpora import peptide
+from xenopict import Xenopict
+
+RESIDUES = [5, 10, 20, 40, 100]  # 5 heavy atoms each: up to 500 atoms
+MAX_INCREMENTAL = 250
+
+
+def incremental_skeleton(x: Xenopict, atoms, twohop=True):
+    """The previous implementation: one union per atom, bond and two-hop pair."""
+    atom_set = set(atoms)
+    out = LineString()
+    for a in atoms:
+        out = out.union(Point(*x.coords[a]))
+
+    bonds = [(b.GetBeginAtomIdx(), b.GetEndAtomIdx()) for b in x.mol.GetBonds()]
+    bonds = [b for b in bonds if b[0] in atom_set and b[1] in atom_set]
+    for a1, a2 in bonds:
+        out = out.union(LineString([x.coords[a1], x.coords[a2]]))
+
+    if twohop:
+        neighborhood = defaultdict(set)
+        for a1, a2 in bonds:
+            neighborhood[a1].add(a2)
+            neighborhood[a2].add(a1)
+        for a in neighborhood:
+            for n in neighborhood[a]:
+                for m in neighborhood[n]:
+                    out = out.union(LineString([x.coords[a], x.coords[m]]))
+    return out
+
+
+def _time(f, repeats: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeats):
+        f()
+    return (time.perf_counter() - start) / repeats
+
+
+def main(repeats: int = 5):
+    print(f"{'atoms':>6}{'union ms':>12}{'bulk ms':>12}{'speedup':>10}{'mark ms':>12}")
+    for n in RESIDUES:
+        x = Xenopict(peptide(n))
+        atoms = list(range(x.mol.GetNumAtoms()))
+
+        t_new = _time(lambda: x._shapely_from_atoms(atoms, twohop=True), repeats)
+        t_mark = _time(lambda: x.copy().mark_substructure(atoms), repeats)
+
+        if len(atoms) <= MAX_INCREMENTAL:
+            # incremental union is slow on large molecules, so run it once
+            t_old = _time(lambda: incremental_skeleton(x, atoms), 1)
+            old, speedup = f"{t_old * 1000:.1f}", f"{t_old / t_new:.0f}x"
+        else:
+            old = speedup = "-"
+
+        print(
+            f"{len(atoms):>6}{old:>12}{t_new * 1000:>12.2f}"
+            f"{speedup:>10}{t_mark * 1000:>12.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:]))
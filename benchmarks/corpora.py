@@ -0,0 +1,50 @@
+"""
+Tiered molecule corpora for the benchmarks.
+
+- ``small``: drug-like molecules (10-35 heavy atoms).
+- ``large``: natural products (50-100 heavy atoms, many rings and stereocenters).
+- ``peptides``: linear poly-alanines (up to 500 heavy atoms).
+"""
+from __future__ import annotations
+
+from rdkit import Chem
+
+SMALL = [
+    "CC(=O)Oc1ccccc1C(=O)O",  # aspirin
+    "CC(=O)Nc1ccc(O)cc1",  # paracetamol
+    "CN1C=NC2=C1C(=O)N(C(=O)N2C)C",  # caffeine
+    "CC(C)Cc1ccc(cc1)[C@@H](C)C(=O)O",  # ibuprofen
+    "O=C(O)Cc1ccccc1Nc1c(Cl)cccc1Cl",  # diclofenac
+    "CN1CCC[C@H]1c1cccnc1",  # nicotine
+    "CC(C)NCC(O)COc1cccc2ccccc12",  # propranolol
+    "CN(C)CCCN1c2ccccc2CCc2ccccc21",  # imipramine
+    "COc1ccc2[nH]cc(CCNC(C)=O)c2c1",  # melatonin
+    "Cc1c(C)c2OC(C)(COc3ccc(CC4SC(=O)NC4=O)cc3)CCc2c(C)c1O",  # troglitazone
+    "CC1=C(C(=O)c2ccccc2C1=O)C/C=C(\\C)CCC[C@H](C)CCC[C@H](C)CCCC(C)C",  # vitamin K1
+    "O=C(c1ccc(F)cc1)C1CCN(CCn2c(=O)[nH]c3ccccc3c2=O)CC1",  # ketanserin
+]
+
+LARGE = [
+    # digoxin
+    "C[C@H]1O[C@@H](O[C@H]2[C@@H](O)C[C@H](O[C@H]3[C@@H](O)C[C@H](O[C@H]4CC[C@]5(C)[C@H]6C[C@@H](O)[C@]7(C)[C@@H](C8=CC(=O)OC8)CC[C@]7(O)[C@@H]6CC[C@@H]5C4)O[C@@H]3C)O[C@@H]2C)C[C@@H](O)[C@@H]1O",
+    # erythromycin
+    "CC[C@@H]1[C@@]([C@@H]([C@H](C(=O)[C@@H](C[C@@]([C@@H]([C@H]([C@@H]([C@H](C(=O)O1)C)O[C@H]2C[C@@]([C@H]([C@@H](O2)C)O)(C)OC)C)O[C@H]3[C@@H]([C@H](C[C@H](O3)C)N(C)C)O)(C)O)C)C)O)(C)O",
+    # paclitaxel
+    "CC1=C2[C@@]([C@]([C@H]([C@@H]3[C@]4([C@H](OC4)C[C@@H]([C@]3(C(=O)[C@@H]2OC(=O)C)C)O)OC(=O)C)OC(=O)c5ccccc5)(C[C@@H]1OC(=O)[C@H](O)[C@@H](NC(=O)c6ccccc6)c7ccccc7)O)(C)C",
+    # rapamycin
+    "CO[C@@H]1C[C@H](C[C@@H](C)[C@@H]2CC(=O)[C@H](C)/C=C(\\C)/[C@@H](O)[C@@H](OC)C(=O)[C@H](C)C[C@H](C)/C=C/C=C/C=C(\\C)/[C@H](C[C@@H]3CC[C@@H](C)[C@@](O)(O3)C(=O)C(=O)N3CCCC[C@H]3C(=O)O2)OC)CC[C@H]1O",
+]
+
+
+def peptide(residues: int) -> str:
+    """Smiles of a linear poly-alanine."""
+    return "N" + "C(C)C(=O)N" * (residues - 1) + "C(C)C(=O)O"
+
+
+PEPTIDES = [peptide(n) for n in (10, 40, 100)]
+
+CORPORA = {"small": SMALL, "large": LARGE, "peptides": PEPTIDES}
+
+
+def load(tier: str) -> list[Chem.Mol]:
+    return [Chem.MolFromSmiles(s) for s in CORPORA[tier]]
@@ -0,0 +1,149 @@
+"""
+Benchmarks of Xenopict's hot paths, over the tiered corpora of :mod:`corpora`.
+
+Each benchmark times one operation over a whole corpus, and records the size
+in bytes of what it produces in ``extra_info``, so that speed and output size
+can be tracked together. Runs offline with pytest-benchmark:
+
+    python -m pytest benchmarks --benchmark-only
+    python -m pytest benchmarks --benchmark-only -k small --benchmark-json=out.json
+"""
+from __future__ import annotations
+
+import pickle
+
+import pytest
+
+import corpora
+from xenopict import Xenopict
+
+pytest.importorskip("pytest_benchmark")
+
+TIERS = list(corpora.CORPORA)
+
+
+@pytest.fixture(scope="module", params=TIERS)
+def tier(request):
+    return request.param
+
+
+@pytest.fixture(scope="module")
+def mols(tier):
+    return corpora.load(tier)
+
+
+@pytest.fixture(scope="module")
+def pictures(mols):
+    return [Xenopict(m) for m in mols]
+
+
+@pytest.fixture(scope="module")
+def shaded(pictures):
+    return [_shade(x) for x in [x.copy() for x in pictures]]
+
+
+def _shading(x: Xenopict) -> list[float]:
+    n = x.mol.GetNumAtoms()
+    return [((i * 7919) % 200) / 100 - 1 for i in range(n)]
+
+
+def _shade(x: Xenopict) -> Xenopict:
+    return x.shade(_shading(x))
+
+
+def _neighborhoods(x: Xenopict) -> list[list[int]]:
+    """Every third atom with its neighbors."""
+    return [
+        [a.GetIdx()] + [n.GetIdx() for n in a.GetNeighbors()]
+        for a in x.mol.GetAtoms()
+        if a.GetIdx() % 3 == 0
+    ]
+
+
+def _half(x: Xenopict) -> list[int]:
+    return list(range(x.mol.GetNumAtoms() // 2 + 1))
+
+
+def _copies(pictures):
+    return lambda: (([x.copy() for x in pictures],), {})
+
+
+def _svg_bytes(pictures) -> int:
+    return sum(len(x.to_svg().encode()) for x in pictures)
+
+
+def test_draw(benchmark, mols):
+    out = benchmark(lambda: [Xenopict(m) for m in mols])
+    benchmark.extra_info["bytes"] = _svg_bytes(out)
+
+
+def test_shade(benchmark, pictures):
+    def shade(copies):
+        return [_shade(x) for x in copies]
+
+    out = benchmark.pedantic(shade, setup=_copies(pictures), rounds=10)
+    benchmark.extra_info["bytes"] = _svg_bytes(out)
+
+
+def test_shade_substructure(benchmark, pictures):
+    def shade(copies):
+        out = []
+        for x in copies:
+            substrs = _neighborhoods(x)
+            out.append(x.shade_substructure(substrs, _shading(x)[: len(substrs)]))
+        return out
+
+    out = benchmark.pedantic(shade, setup=_copies(pictures), rounds=5)
+    benchmark.extra_info["bytes"] = _svg_bytes(out)
+
+
+def test_mark_substructure(benchmark, pictures):
+    def mark(copies):
+        return [x.mark_substructure(_half(x)) for x in copies]
+
+    out = benchmark.pedantic(mark, setup=_copies(pictures), rounds=5)
+    benchmark.extra_info["bytes"] = _svg_bytes(out)
+
+
+def test_filter(benchmark, pictures):
+    def filter(copies):
+        return [x.filter(_half(x), None) for x in copies]
+
+    out = benchmark.pedantic(filter, setup=_copies(pictures), rounds=10)
+    benchmark.extra_info["bytes"] = _svg_bytes(out)
+
+
+def test_to_svg(benchmark, shaded):
+    out = benchmark(lambda: [x.to_svg() for x in shaded])
+    benchmark.extra_info["bytes"] = sum(len(s.encode()) for s in out)
+
+
+def test_to_html(benchmark, shaded):
+    out = benchmark(lambda: [x.to_html() for x in shaded])
+    benchmark.extra_info["bytes"] = sum(len(s.encode()) for s in out)
+
+
+def test_pickle_roundtrip(benchmark, shaded):
+    def roundtrip():
+        dumps = [pickle.dumps(x) for x in shaded]
+        return dumps, [pickle.loads(d) for d in dumps]
+
+    dumps, _ = benchmark(roundtrip)
+    benchmark.extra_info["bytes"] = sum(len(d) for d in dumps)
+
+
+def test_magic_formatters(benchmark, mols, pictures):
+    from xenopict import magic
+
+    def format():
+        html = [magic._rdkit_repr_html(m) for m in mols]
+        svg = [magic._rdkit_repr_svg(m) for m in mols]
+        return html + svg + [magic._list_mol_html(pictures)]
+
+    def forget():
+        # time drawing, not the memoized renderings of earlier rounds
+        magic._renderings.clear()
+        magic._pagers.clear()
+
+    out = benchmark.pedantic(format, setup=forget, rounds=5)
+    benchmark.extra_info["bytes"] = sum(len(s.encode()) for s in out)
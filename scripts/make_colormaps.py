@@ -1,6 +1,22 @@
+"""
+Generate xenopict/colormaps.npz, the built-in colormaps, from their definitions below.
+
+    python scripts/make_colormaps.py [output]
+
+Each map is a list of RGB colors, defined to four decimals, and is stored as
+uint16 values scaled by 10000 (which is exact). Edit the definitions here, and
+run this script again to update the packaged file.
+"""
 from __future__ import annotations
 
-colormaps : dict[str,list[list[float]]]= {
+import os
+import sys
+
+import numpy as np
+
+OUTPUT = os.path.join(os.path.dirname(__file__), os.pardir, "xenopict", "colormaps.npz")
+
+colormaps: dict[str, list[list[float]]] = {
     "xenosite": [
         [1.0, 1.0, 1.0],
         [0.9962, 0.9977, 1.0],
@@ -3570,3 +3586,19 @@ colormaps : dict[str,list[list[float]]]= {
         [0.4413, 0.4413, 0.4413],
     ],
 }
+
+
+def scaled(colors: list[list[float]]) -> np.ndarray:
+    """A map as uint16 values scaled by 10000, checking that this is exact."""
+    values = np.round(np.array(colors) * 10000).astype(np.uint16)
+    if not np.array_equal(values / 10000, colors):
+        raise ValueError("Colormaps must be defined to four decimals.")
+    return values
+
+
+def main(path: str = OUTPUT):
+    np.savez_compressed(path, **{name: scaled(colors) for name, colors in colormaps.items()})
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:])
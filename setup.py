@@ -32,6 +32,8 @@ setup(
     author_email="swamidass@wustl.edu",
     url="https://github.com/swamidasslab/xenopict/",
     packages=["xenopict"],
+    package_data={"xenopict": ["colormaps.npz"]},
+    entry_points={"console_scripts": ["xenopict=xenopict.cli:main"]},
     install_requires=[
         "matplotlib>=3.5",
         "colorcet",
@@ -39,13 +41,14 @@ setup(
         "simplejson",
         "decorator",
         "rdkit",
-        "shapely"
+        "shapely>=2"
     ],
     extra_requires={
         "pdf": ["cairosvg"],
         "pandas": ["pandas"],
         "ipython": ["ipython"],
-        "all": ["cairosvg", "pandas", "ipython", "colorcet"],
+        "widgets": ["ipywidgets"],
+        "all": ["cairosvg", "pandas", "ipython", "colorcet", "ipywidgets"],
     },
     classifiers=[
         "Development Status :: 4 - Beta",
@@ -1,2 +1,17 @@
 from ._version import __version__
-from .drawer import Xenopict, shaded_svg
+
+# public name -> module defining it
+_LAZY = {"Xenopict": "drawer", "shaded_svg": "drawer", "arender": "aio"}
+
+__all__ = list(_LAZY)
+
+
+def __getattr__(name: str):
+    # The drawer (and with it rdkit and numpy) is imported on first use, so
+    # that importing xenopict, or one of its light modules, stays fast.
+    if name in _LAZY:
+        import importlib
+
+        module = importlib.import_module(f".{_LAZY[name]}", __name__)
+        return getattr(module, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
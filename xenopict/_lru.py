@@ -0,0 +1,60 @@
+"""
+A small in-memory LRU cache, with no dependencies (so that modules that must
+import quickly, like :mod:`xenopict.colormap`, can use it). Import it from
+:mod:`xenopict.cache`.
+"""
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from typing import Generic, Hashable, Optional, TypeVar
+
+__all__ = ["LRUCache"]
+
+V = TypeVar("V")
+
+
+class LRUCache(Generic[V]):
+    """
+    A small, thread-safe, in-memory LRU cache, for finished renderings (svg or html).
+
+    >>> c = LRUCache(maxsize=2)
+    >>> c.put("a", 1); c.put("b", 2); c.put("c", 3)
+    >>> c.get("a"), c.get("c"), len(c)
+    (None, 3, 2)
+    """
+
+    def __init__(self, maxsize: int = 4096):
+        self.maxsize = maxsize
+        self._entries: OrderedDict[Hashable, V] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def get(self, key: Hashable) -> Optional[V]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+            else:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: V):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
@@ -0,0 +1,242 @@
+"""
+Pandas accessors that render columns of molecules with xenopict.
+
+Importing this module registers a ``xenopict`` accessor on Series and
+DataFrames. It renders each distinct molecule of a column once (in parallel
+batches, with :func:`xenopict.batch.render_many`), and keeps the renderings
+in a shared in-memory cache, so showing the same table again costs nothing:
+
+>>> import pandas as pd
+>>> import xenopict.accessor
+>>> df = pd.DataFrame({"smiles": ["CCO", "c1ccccc1", "CCO"], "logp": [-0.0, 1.7, -0.0]})
+>>> html = df["smiles"].xenopict.html(processes=1)
+>>> html[0] == html[2]  # drawn once
+True
+>>> styler = df.xenopict.style("smiles", processes=1)
+>>> html[1] in styler.to_html()
+True
+
+Cells holding smiles strings, RDKit molecules, or :class:`.Xenopict`
+depictions are rendered; missing values are left alone. Drawing options
+(like ``scale``) are passed on to each :class:`.Xenopict`.
+"""
+from __future__ import annotations
+
+import json
+from concurrent.futures import Executor
+from typing import TYPE_CHECKING, Any, Hashable, Optional, Sequence, Union
+
+import pandas as pd
+from rdkit.Chem import rdchem
+
+from .batch import render_many
+from .cache import LRUCache, mol_identity
+from .timing import timed
+
+if TYPE_CHECKING:
+    from pandas.io.formats.style import Styler
+
+__all__ = ["XenopictSeriesAccessor", "XenopictFrameAccessor", "cache"]
+
+cache: LRUCache[str] = LRUCache(maxsize=4096)
+"""Renderings shared by all accessors, keyed by molecule, format and options."""
+
+
+def _is_drawable(value: Any) -> bool:
+    from .drawer import Xenopict
+
+    return isinstance(value, (str, rdchem.Mol, Xenopict))
+
+
+def _mol_key(value: Union[str, rdchem.Mol]) -> str:
+    if isinstance(value, str):
+        return "smiles:" + value
+    return "mol:" + mol_identity(value)
+
+
+def _cache_key(mol_key: str, format: str, options: dict) -> str:
+    from .drawer import Xenopict
+
+    # drawing options can be changed on the class, so they are part of the key
+    defaults = [repr(getattr(Xenopict, o)) for o in Xenopict.depiction_options]
+    opts = sorted((k, repr(v)) for k, v in options.items())
+    return json.dumps([format, mol_key, opts, defaults])
+
+
+@timed("accessor_render")
+def _render(
+    values: Sequence,
+    format: str,
+    processes: Optional[int],
+    chunksize: int,
+    executor: Optional[Executor],
+    options: dict,
+) -> list:
+    """Render values (in order), drawing each molecule not yet in the cache once."""
+    from .drawer import Xenopict
+
+    keys: list[Optional[str]] = []
+    texts: dict[str, str] = {}  # cache key -> rendering
+    missing: dict[str, Any] = {}  # cache key -> first value with that key
+    for v in values:
+        if isinstance(v, Xenopict) or not _is_drawable(v):
+            # depictions may have changed since they were last rendered, so are not cached
+            keys.append(None)
+            continue
+        key = _cache_key(_mol_key(v), format, options)
+        keys.append(key)
+        if key in texts or key in missing:
+            continue
+        text = cache.get(key)
+        if text is None:
+            missing[key] = v
+        else:
+            texts[key] = text
+
+    if executor is None and len(missing) <= chunksize:
+        processes = 1  # not worth starting a pool
+    rendered = render_many(
+        missing.values(),
+        processes=processes,
+        chunksize=chunksize,
+        executor=executor,
+        format=format,
+        **options,
+    )
+    for key, text in zip(missing, rendered):
+        texts[key] = text
+        cache.put(key, text)
+
+    out = []
+    for v, key in zip(values, keys):
+        if key is not None:
+            out.append(texts[key])
+        elif isinstance(v, Xenopict):
+            out.append(v.to_svg() if format == "svg" else v.to_html())
+        else:
+            out.append(v)
+    return out
+
+
+@pd.api.extensions.register_series_accessor("xenopict")
+class XenopictSeriesAccessor:
+    """
+    ``Series.xenopict``: render a column of molecules.
+
+    Both methods return a Series aligned with the original, holding the
+    rendering of each drawable cell (and every other cell unchanged).
+    """
+
+    def __init__(self, series: pd.Series):
+        self._series = series
+
+    def render(
+        self,
+        format: str = "html",
+        processes: Optional[int] = None,
+        chunksize: int = 16,
+        executor: Optional[Executor] = None,
+        **options: Any,
+    ) -> pd.Series:
+        """
+        Render each molecule in the column.
+
+        Args:
+            format (str, optional):
+                Either "html" (the default) or "svg".
+            processes (int | None, optional):
+                Number of worker processes (see :func:`.render_many`). Small
+                batches are always rendered in this process.
+            chunksize (int, optional):
+                Number of molecules sent to a worker at a time. Defaults to 16.
+            executor (Executor | None, optional):
+                Render with this executor instead of a new process pool.
+            **options:
+                Drawing options passed to each :class:`.Xenopict`.
+
+        Returns:
+            pd.Series: The renderings, with the index and name of the column.
+        """
+        out = _render(
+            list(self._series), format, processes, chunksize, executor, options
+        )
+        return pd.Series(out, index=self._series.index, name=self._series.name)
+
+    def html(self, **kwargs: Any) -> pd.Series:
+        return self.render("html", **kwargs)
+
+    def svg(self, **kwargs: Any) -> pd.Series:
+        return self.render("svg", **kwargs)
+
+
+@pd.api.extensions.register_dataframe_accessor("xenopict")
+class XenopictFrameAccessor:
+    """``DataFrame.xenopict``: render the molecule columns of a table."""
+
+    def __init__(self, frame: pd.DataFrame):
+        self._frame = frame
+
+    def _columns(self, columns: Union[Hashable, Sequence[Hashable], None]) -> list:
+        if columns is None:
+            # columns of molecules (smiles columns must be named explicitly)
+            from .drawer import Xenopict
+
+            return [
+                c
+                for c in self._frame.columns
+                if any(isinstance(v, (rdchem.Mol, Xenopict)) for v in self._frame[c])
+            ]
+        if isinstance(columns, (list, tuple)):
+            return list(columns)
+        return [columns]
+
+    def render(
+        self,
+        columns: Union[Hashable, Sequence[Hashable], None] = None,
+        format: str = "html",
+        **kwargs: Any,
+    ) -> pd.DataFrame:
+        """
+        A copy of the table, with the molecules in `columns` (by default, all
+        columns holding RDKit molecules or depictions) replaced by their renderings.
+        Takes the same keyword arguments as :meth:`XenopictSeriesAccessor.render`.
+        """
+        frame = self._frame.copy()
+        for c in self._columns(columns):
+            frame[c] = frame[c].xenopict.render(format, **kwargs)
+        return frame
+
+    def style(
+        self,
+        columns: Union[Hashable, Sequence[Hashable], None] = None,
+        styler: Optional["Styler"] = None,
+        **kwargs: Any,
+    ) -> "Styler":
+        """
+        A :class:`pandas.io.formats.style.Styler` of the table that shows the
+        molecules in `columns` as depictions. They are rendered now, so
+        displaying the styler (again and again) only looks them up.
+
+        Args:
+            columns (Hashable | Sequence[Hashable] | None, optional):
+                Columns to show as depictions. Defaults to all columns holding
+                RDKit molecules or depictions.
+            styler (Styler | None, optional):
+                Add the formatting to this styler, instead of ``frame.style``.
+            **kwargs:
+                Passed to :meth:`XenopictSeriesAccessor.render`.
+        """
+        styler = self._frame.style if styler is None else styler
+        for c in self._columns(columns):
+            values = self._frame[c]
+            html = values.xenopict.html(**kwargs)
+            # cells are looked up by value (smiles), or else by object
+            lookup = {_cell_id(v): h for v, h in zip(values, html)}
+            styler = styler.format(
+                lambda v, lookup=lookup: lookup.get(_cell_id(v), v), subset=[c]
+            )
+        return styler
+
+
+def _cell_id(value: Any) -> Hashable:
+    return value if isinstance(value, str) else id(value)
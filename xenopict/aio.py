@@ -0,0 +1,239 @@
+"""
+Render depictions from asyncio code, without blocking the event loop.
+
+Drawing runs RDKit and DOM work that would block the event loop, so
+:class:`AsyncRenderer` runs it in a pool of worker processes (or a given
+executor), and only ships the finished SVG (or HTML) string back:
+
+>>> import asyncio
+>>> async def main():
+...     async with AsyncRenderer(max_workers=1, use_processes=False) as renderer:
+...         one = await renderer.render("CCO", [1, 0, -1])
+...         many = [svg async for svg in renderer.render_many(["CCO", "CCN"])]
+...     return one, many
+>>> one, many = asyncio.run(main())
+>>> len(many)
+2
+
+At most `max_concurrency` drawings are submitted at once; further calls wait
+for a free slot (backpressure), or, beyond `max_pending` waiting calls, fail
+fast with :class:`asyncio.QueueFull` (to shed load in a web service).
+Cancelling a call withdraws its drawing if it has not started yet.
+
+For convenience, :func:`arender` draws with a shared, lazily created renderer:
+
+>>> svg = asyncio.run(arender("CCO", [1, 0, -1]))  # doctest: +SKIP
+"""
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import os
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, AsyncIterator, Iterable, Optional
+
+from .batch import _aligned, _render_one
+
+__all__ = ["AsyncRenderer", "arender", "shutdown"]
+
+
+class AsyncRenderer:
+    """
+    Renders depictions in an executor, with bounded concurrency.
+
+    Args:
+        max_workers (int | None, optional):
+            Number of workers of the managed executor. Defaults to the number of cpus.
+        max_concurrency (int | None, optional):
+            Maximum number of drawings submitted (queued or running) at once.
+            Defaults to twice the number of workers.
+        max_pending (int | None, optional):
+            Maximum number of calls waiting for a slot, beyond which calls raise
+            :class:`asyncio.QueueFull`. Defaults to None (unbounded).
+        executor (Executor | None, optional):
+            Use this executor instead of managing one. It is not shut down by
+            :meth:`close`.
+        use_processes (bool, optional):
+            Whether the managed executor is a process pool (the default, so that
+            drawings run in parallel) or a thread pool.
+        xenopict_class (type | None, optional):
+            Class used to draw each molecule. Defaults to :class:`.Xenopict`.
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        max_concurrency: Optional[int] = None,
+        max_pending: Optional[int] = None,
+        executor: Optional[Executor] = None,
+        use_processes: bool = True,
+        xenopict_class: Optional[type] = None,
+    ):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_concurrency = max_concurrency or 2 * self.max_workers
+        self.max_pending = max_pending
+        self.use_processes = use_processes
+        self.xenopict_class = xenopict_class
+
+        self._executor = executor
+        self._own_executor = executor is None
+        self._closed = False
+
+        # the semaphore belongs to an event loop, so it is made in the running one
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._waiting = 0
+
+    def _get_executor(self) -> Executor:
+        if self._closed:
+            raise RuntimeError("AsyncRenderer is closed.")
+        if self._executor is None:
+            pool = ProcessPoolExecutor if self.use_processes else ThreadPoolExecutor
+            self._executor = pool(self.max_workers)
+        return self._executor
+
+    def _get_slots(self, loop: asyncio.AbstractEventLoop) -> asyncio.Semaphore:
+        if self._loop is not loop:
+            self._loop = loop
+            self._slots = asyncio.Semaphore(self.max_concurrency)
+            self._waiting = 0
+        return self._slots  # type: ignore
+
+    async def render(
+        self,
+        mol: Any,
+        atom_shading: Optional[Any] = None,
+        bond_shading: Optional[Any] = None,
+        format: str = "svg",
+        **options: Any,
+    ) -> str:
+        """
+        Draw a molecule (shaded, if shadings are given), like one item of
+        :func:`.render_many`.
+
+        Args:
+            mol (RDKMol | str | Xenopict): Molecule (or smiles) to draw.
+            atom_shading (AtomShading | None, optional): Defaults to None.
+            bond_shading (BondShading | None, optional): Defaults to None.
+            format (str, optional): Either "svg" (the default) or "html".
+            **options: Drawing options passed to :class:`.Xenopict`.
+
+        Returns:
+            str: The rendered depiction.
+        """
+        if format not in ("svg", "html"):
+            raise ValueError(f"Unknown format: {format}")
+
+        xenopict_class = self.xenopict_class
+        if xenopict_class is None:
+            from .drawer import Xenopict
+
+            xenopict_class = Xenopict
+
+        loop = asyncio.get_running_loop()
+        slots = self._get_slots(loop)
+
+        if slots.locked():
+            if self.max_pending is not None and self._waiting >= self.max_pending:
+                raise asyncio.QueueFull(f"{self._waiting} renderings are already waiting.")
+        self._waiting += 1
+        try:
+            await slots.acquire()
+        finally:
+            self._waiting -= 1
+
+        try:
+            future = self._get_executor().submit(
+                _render_one, xenopict_class, mol, atom_shading, bond_shading, options, format
+            )
+        except BaseException:
+            slots.release()
+            raise
+
+        # the slot is held until the drawing is done (or withdrawn), even if
+        # the caller stops waiting for it, so workers are never oversubscribed
+        def release(_):
+            with contextlib.suppress(RuntimeError):  # the loop is closed
+                loop.call_soon_threadsafe(slots.release)
+
+        future.add_done_callback(release)
+        return await asyncio.wrap_future(future)
+
+    async def render_many(
+        self,
+        mols: Iterable,
+        atom_shadings: Optional[Iterable] = None,
+        bond_shadings: Optional[Iterable] = None,
+        format: str = "svg",
+        **options: Any,
+    ) -> AsyncIterator[str]:
+        """
+        Draw many molecules, yielding their renderings in input order.
+
+        Only a window of drawings is in flight at a time, so long iterables are
+        drawn in constant memory. Takes the same arguments as :func:`.render_many`.
+        """
+        items = _aligned(mols, atom_shadings, bond_shadings)
+
+        pending: deque[asyncio.Task] = deque()
+        try:
+            for mol, atom_shading, bond_shading in items:
+                pending.append(
+                    asyncio.ensure_future(
+                        self.render(mol, atom_shading, bond_shading, format, **options)
+                    )
+                )
+                if len(pending) >= self.max_concurrency:
+                    yield await pending.popleft()
+
+            while pending:
+                yield await pending.popleft()
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def close(self, wait: bool = True):
+        """Shut down the managed executor (withdrawing drawings not yet started)."""
+        self._closed = True
+        if self._own_executor and self._executor is not None:
+            executor, self._executor = self._executor, None
+            shutdown = lambda: executor.shutdown(wait=wait, cancel_futures=True)  # noqa: E731
+            if wait:
+                await asyncio.get_running_loop().run_in_executor(None, shutdown)
+            else:
+                shutdown()
+
+    async def __aenter__(self) -> "AsyncRenderer":
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+
+_default: Optional[AsyncRenderer] = None
+
+
+async def arender(
+    mol: Any,
+    atom_shading: Optional[Any] = None,
+    bond_shading: Optional[Any] = None,
+    format: str = "svg",
+    **options: Any,
+) -> str:
+    """
+    Draw a molecule with a shared :class:`AsyncRenderer` (created with default
+    arguments on first use), like :meth:`AsyncRenderer.render`.
+    """
+    global _default
+    if _default is None or _default._closed:
+        _default = AsyncRenderer()
+    return await _default.render(mol, atom_shading, bond_shading, format, **options)
+
+
+async def shutdown():
+    """Close the shared renderer used by :func:`arender`."""
+    global _default
+    if _default is not None:
+        renderer, _default = _default, None
+        await renderer.close()
@@ -0,0 +1,195 @@
+"""
+Render many molecules at once, fanning the work out over a pool of processes.
+
+Each worker builds its own :class:`.Xenopict` and ships back only the
+serialized SVG (or HTML) string, so no DOM ever crosses a process boundary.
+
+>>> svgs = list(render_many(["CCO", "c1ccccc1"], [[1, 0, -1], None], processes=1))
+>>> len(svgs)
+2
+>>> svgs[0]
+'<...>'
+"""
+from __future__ import annotations
+
+import itertools
+import os
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Any, Iterable, Iterator, Optional
+
+__all__ = ["render_many", "RenderFailure"]
+
+
+class RenderFailure(Exception):
+    """
+    A molecule that could not be drawn, yielded in place of its rendering by
+    :func:`render_many` with ``errors="return"``.
+    """
+
+
+def _render_one(xenopict_class, mol, atom_shading, bond_shading, options, format):
+    drawer = xenopict_class(mol, **options)
+    if atom_shading is not None or bond_shading is not None:
+        drawer.shade(atom_shading, bond_shading)
+
+    if format == "svg":
+        return drawer.to_svg()
+    if format == "html":
+        return drawer.to_html()
+    raise ValueError(f"Unknown format: {format}")
+
+
+def _render_or_fail(xenopict_class, mol, atom_shading, bond_shading, options, format):
+    try:
+        return _render_one(xenopict_class, mol, atom_shading, bond_shading, options, format)
+    except Exception as e:
+        # only the message crosses back from workers, as not all errors can be pickled
+        return RenderFailure(f"{type(e).__name__}: {e}")
+
+
+def _render_chunk(xenopict_class, chunk, options, format, errors="raise") -> list:
+    render = _render_or_fail if errors == "return" else _render_one
+    return [
+        render(xenopict_class, mol, atom_shading, bond_shading, options, format)
+        for mol, atom_shading, bond_shading in chunk
+    ]
+
+
+def _chunks(iterable: Iterable, size: int) -> Iterator[list]:
+    it = iter(iterable)
+    while chunk := list(itertools.islice(it, size)):
+        yield chunk
+
+
+_MISSING = object()
+
+
+def _aligned(
+    mols: Iterable, atom_shadings: Optional[Iterable], bond_shadings: Optional[Iterable]
+) -> Iterator[tuple]:
+    """
+    Stream (mol, atom_shading, bond_shading) triples, raising a ValueError if
+    the given shadings do not have one entry per molecule.
+
+    >>> list(_aligned(["C", "N"], [[1], [0]], None))
+    [('C', [1], None), ('N', [0], None)]
+    >>> list(_aligned(["C", "N"], [[1]], None))
+    Traceback (most recent call last):
+    ...
+    ValueError: Got more molecules than atom shadings.
+    """
+    columns = [iter(mols)]
+    names = []
+    for name, shadings in [("atom", atom_shadings), ("bond", bond_shadings)]:
+        if shadings is not None:
+            columns.append(iter(shadings))
+            names.append(name)
+
+    for row in itertools.zip_longest(*columns, fillvalue=_MISSING):
+        if _MISSING in row:
+            if row[0] is _MISSING:
+                missing = [n for n, v in zip(names, row[1:]) if v is not _MISSING]
+                raise ValueError(f"Got more {missing[0]} shadings than molecules.")
+            missing = [n for n, v in zip(names, row[1:]) if v is _MISSING]
+            raise ValueError(f"Got more molecules than {missing[0]} shadings.")
+
+        values = dict(zip(names, row[1:]))
+        yield row[0], values.get("atom"), values.get("bond")
+
+
+def render_many(
+    mols: Iterable,
+    atom_shadings: Optional[Iterable] = None,
+    bond_shadings: Optional[Iterable] = None,
+    processes: Optional[int] = None,
+    chunksize: int = 16,
+    executor: Optional[Executor] = None,
+    format: str = "svg",
+    xenopict_class: Optional[type] = None,
+    errors: str = "raise",
+    **options: Any,
+) -> Iterator[Any]:
+    """
+    Render many molecules, yielding one SVG string per input in input order.
+
+    Results are streamed: each one is yielded as soon as it and everything
+    before it is done, and only a bounded window of work is submitted ahead,
+    so arbitrarily long generators of molecules can be rendered in constant
+    memory.
+
+    Args:
+        mols (Iterable[RDKMol | str | Xenopict]):
+            Molecules (or smiles) to render.
+        atom_shadings (Iterable[AtomShading | None] | None, optional):
+            Atom shading for each molecule, aligned with `mols`. Defaults to None.
+        bond_shadings (Iterable[BondShading | None] | None, optional):
+            Bond shading for each molecule, aligned with `mols`. Defaults to None.
+        processes (int | None, optional):
+            Number of worker processes. Defaults to the number of cpus. With 0
+            or 1, molecules are rendered serially in the calling process.
+        chunksize (int, optional):
+            Number of molecules sent to a worker at a time. Defaults to 16.
+        executor (Executor | None, optional):
+            Use this executor instead of creating (and shutting down) a process pool.
+        format (str, optional):
+            Either "svg" (:meth:`.Xenopict.to_svg`) or "html" (:meth:`.Xenopict.to_html`).
+        xenopict_class (type | None, optional):
+            Class used to draw each molecule. Defaults to :class:`.Xenopict`.
+        errors (str, optional):
+            With "raise" (the default), the first molecule that cannot be drawn
+            raises its error. With "return", a :class:`RenderFailure` is yielded
+            in its place, and the other molecules are still drawn.
+        **options:
+            Drawing options passed to each :class:`.Xenopict`.
+
+    Yields:
+        str: The rendered depiction of each molecule (or a :class:`RenderFailure`).
+
+    >>> [type(r).__name__ for r in render_many(["CCO", "[CH2]C"], processes=1, errors="return")]
+    ['str', 'RenderFailure']
+    """
+    if xenopict_class is None:
+        from .drawer import Xenopict
+
+        xenopict_class = Xenopict
+
+    if format not in ("svg", "html"):
+        raise ValueError(f"Unknown format: {format}")
+    if errors not in ("raise", "return"):
+        raise ValueError(f"Unknown errors: {errors}")
+
+    items = _aligned(mols, atom_shadings, bond_shadings)
+
+    if processes is None:
+        processes = os.cpu_count() or 1
+
+    if executor is None and processes <= 1:
+        for chunk in _chunks(items, 1):
+            yield from _render_chunk(xenopict_class, chunk, options, format, errors)
+        return
+
+    own_executor = executor is None
+    if own_executor:
+        executor = ProcessPoolExecutor(processes)
+
+    window = 2 * max(processes, 1)
+    pending = deque()
+
+    try:
+        for chunk in _chunks(items, chunksize):
+            pending.append(
+                executor.submit(  # type: ignore
+                    _render_chunk, xenopict_class, chunk, options, format, errors
+                )
+            )
+            if len(pending) >= window:
+                yield from pending.popleft().result()
+
+        while pending:
+            yield from pending.popleft().result()
+    finally:
+        for future in pending:
+            future.cancel()
+        if own_executor:
+            executor.shutdown(wait=True)  # type: ignore
@@ -0,0 +1,192 @@
+"""
+Opt-in cache of base depictions (before any shading or marks are added).
+
+Drawing a molecule runs RDKit's layout and then xenopict's SVG post-processing.
+When the same molecules are drawn over and over, a :class:`DepictionCache` can
+serve the finished base depiction instead. Set it on :class:`.Xenopict`
+(globally, or per instance as an option):
+
+>>> from xenopict import Xenopict
+>>> cache = DepictionCache(maxsize=100)
+>>> x = Xenopict("CCO", cache=cache)     # drawn, then stored
+>>> y = Xenopict("CCO", cache=cache)     # served from cache
+>>> z = Xenopict("OCC", cache=cache)     # atoms in a different order: drawn again
+>>> cache.hits, cache.misses
+(1, 2)
+>>> x.to_svg() == y.to_svg()
+True
+
+Entries are keyed by the molecule's identity (canonical smiles, plus the atom
+and bond order that shadings and classes are indexed by, plus any input
+coordinates and drawn atom and bond properties, like notes), by every drawing option that changes the base depiction, and by
+the xenopict and RDKit versions.
+"""
+from __future__ import annotations
+
+import contextlib
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Any, Optional
+
+from rdkit import Chem, rdBase
+
+from ._lru import LRUCache
+from ._version import __version__
+
+__all__ = ["DepictionCache", "LRUCache", "depiction_key", "mol_identity"]
+
+# properties of atoms and bonds that RDKit draws
+DRAWN_ATOM_PROPS = ["atomNote", "atomLabel", "dummyLabel", "_displayLabel", "_displayLabelW"]
+DRAWN_BOND_PROPS = ["bondNote"]
+
+
+def _drawn_props(items, props: list[str]) -> list[str]:
+    return [
+        f"{item.GetIdx()}.{p}={item.GetProp(p)!r}"
+        for item in items
+        for p in props
+        if item.HasProp(p)
+    ]
+
+
+def mol_identity(mol: Chem.Mol) -> str:
+    """
+    A string identifying a molecule for the purpose of drawing it.
+
+    >>> mol = Chem.MolFromSmiles("OCC")
+    >>> mol_identity(mol)
+    'CCO [2,1,0] [1,0]'
+    >>> mol.GetAtomWithIdx(0).SetProp("atomNote", "x")
+    >>> mol_identity(mol)
+    "CCO [2,1,0] [1,0] props:0.atomNote='x'"
+    """
+    if any(a.HasQuery() for a in mol.GetAtoms()):
+        # queries (e.g. from SMARTS) have no canonical form
+        ident = "binary:" + hashlib.sha256(mol.ToBinary()).hexdigest()
+    else:
+        ident = " ".join(
+            [
+                Chem.MolToSmiles(mol),
+                mol.GetProp("_smilesAtomOutputOrder"),
+                mol.GetProp("_smilesBondOutputOrder"),
+            ]
+        )
+
+    props = _drawn_props(mol.GetAtoms(), DRAWN_ATOM_PROPS)
+    props += _drawn_props(mol.GetBonds(), DRAWN_BOND_PROPS)
+    if props:
+        ident += " props:" + " ".join(props)
+
+    if mol.GetNumConformers():
+        positions = mol.GetConformer().GetPositions()
+        ident += " coords:" + hashlib.sha256(positions.tobytes()).hexdigest()
+
+    return ident
+
+
+def depiction_key(picture: Any, mol: Optional[Chem.Mol] = None) -> str:
+    """
+    The cache key of the base depiction that `picture` (a :class:`.Xenopict`) would draw of `mol`.
+    """
+    mol = picture.mol if mol is None else mol
+    key = {
+        "xenopict": __version__,
+        "rdkit": rdBase.rdkitVersion,
+        "class": f"{type(picture).__module__}.{type(picture).__qualname__}",
+        "mol": mol_identity(mol),
+        "options": {o: repr(getattr(picture, o)) for o in picture.depiction_options},
+    }
+    return hashlib.sha256(json.dumps(key, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class DepictionCache:
+    """
+    An in-memory LRU cache of base depictions, optionally backed by a directory on disk.
+
+    Args:
+        maxsize (int, optional):
+            Maximum number of depictions held in memory. Defaults to 1024.
+        directory (str | None, optional):
+            If provided, depictions are also stored as json files in this
+            directory, so they survive across processes. Defaults to None.
+    """
+
+    def __init__(self, maxsize: int = 1024, directory: Optional[str] = None):
+        self.maxsize = maxsize
+        self.directory = directory
+        self._entries: OrderedDict[str, dict] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries or bool(
+            self.directory and os.path.exists(self._path(key))
+        )
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")  # type: ignore
+
+    def get(self, key: str) -> Optional[dict]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+
+        if entry is None and self.directory:
+            entry = self._read(key)
+            if entry is not None:
+                self._remember(key, entry)
+
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return entry
+
+    def put(self, key: str, entry: dict):
+        self._remember(key, entry)
+        if self.directory:
+            self._write(key, entry)
+
+    def clear(self):
+        """Empty the in-memory cache (files on disk are left in place)."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    def _remember(self, key: str, entry: dict):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def _read(self, key: str) -> Optional[dict]:
+        try:
+            with open(self._path(key), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write(self, key: str, entry: dict):
+        # write then rename, so concurrent readers never see partial files
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(entry, f)
+            os.replace(tmp, self._path(key))
+        except OSError:
+            with contextlib.suppress(OSError):
+                os.remove(tmp)
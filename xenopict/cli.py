@@ -0,0 +1,342 @@
+"""
+Render a whole SMILES or SDF file of molecules from the command line.
+
+    xenopict library.smi -o depictions/
+    xenopict library.sdf.gz -o depictions.zip --name-column _Name --shading-column charges
+    python -m xenopict hits.smi -o hits/ --format html --scale 30 -j 8
+
+Records are streamed from the input and drawn over all cores (with
+:func:`.render_many`), and each depiction is written to its own file in the
+output directory, or to a zip archive. Runs are resumable: records whose
+output already exists are skipped (use ``--overwrite`` to draw them again).
+Records whose names map to the same file get their record number appended.
+Records that cannot be parsed or drawn, or whose shading does not fit the
+molecule, are reported and skipped. Throughput is reported on stderr as the run goes.
+
+SMILES files have one record per line: a smiles, then (optionally) other
+columns, separated by whitespace or ``--delimiter``. Columns are named by
+their 0-based index, or by name with ``--header``. In SDF files, columns are
+molecule properties (and ``_Name`` is the title line). A shading column holds
+one value per atom, separated by commas or whitespace.
+"""
+from __future__ import annotations
+
+import argparse
+import gzip
+import itertools
+import os
+import re
+import sys
+import tempfile
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import IO, Iterator, NamedTuple, Optional, Sequence
+
+from .batch import RenderFailure, render_many
+
+__all__ = ["main"]
+
+
+class Record(NamedTuple):
+    index: int
+    name: str
+    mol: object  # RDKMol, or None if it could not be parsed
+    shading: Optional[list[float]]
+    error: Optional[str] = None
+
+
+def _open(path: str) -> IO[bytes]:
+    if path == "-":
+        return sys.stdin.buffer
+    return gzip.open(path, "rb") if path.endswith(".gz") else open(path, "rb")
+
+
+def _is_sdf(path: str) -> bool:
+    return re.search(r"\.(sdf|mol|sd)(\.gz)?$", path, re.IGNORECASE) is not None
+
+
+def _shading(value: Optional[str]) -> Optional[list[float]]:
+    if value is None or not value.strip():
+        return None
+    return [float(v) for v in re.split(r"[,\s]+", value.strip())]
+
+
+def _column(header: Optional[list[str]], column: Optional[str]) -> Optional[int]:
+    if column is None:
+        return None
+    if header is not None and column in header:
+        return header.index(column)
+    if column.isdigit():
+        return int(column)
+    raise SystemExit(f"xenopict: no column {column!r} in the header.")
+
+
+def read_smiles(
+    stream: IO[bytes],
+    delimiter: Optional[str] = None,
+    header: bool = False,
+    name_column: Optional[str] = None,
+    shading_column: Optional[str] = None,
+) -> Iterator[Record]:
+    """Stream the records of a SMILES file."""
+    from rdkit import Chem
+
+    lines = (line.decode("utf-8").rstrip("\r\n") for line in stream)
+    names = next(lines).split(delimiter) if header else None
+    name_i = _column(names, name_column)
+    shading_i = _column(names, shading_column)
+
+    for index, line in enumerate(lines):
+        if not line.strip() or line.startswith("#"):
+            continue
+        fields = line.split(delimiter)
+        name = fields[name_i] if name_i is not None and name_i < len(fields) else str(index)
+        mol = Chem.MolFromSmiles(fields[0])
+        if mol is None:
+            yield Record(index, name, None, None, f"invalid smiles {fields[0]!r}")
+            continue
+        try:
+            shading = _shading(fields[shading_i]) if shading_i is not None else None
+        except (ValueError, IndexError):
+            yield Record(index, name, None, None, "invalid shading")
+            continue
+        yield Record(index, name, mol, shading)
+
+
+def read_sdf(
+    stream: IO[bytes],
+    name_column: Optional[str] = None,
+    shading_column: Optional[str] = None,
+) -> Iterator[Record]:
+    """Stream the records of an SDF file."""
+    from rdkit import Chem
+
+    for index, mol in enumerate(Chem.ForwardSDMolSupplier(stream)):
+        name = str(index)
+        if mol is None:
+            yield Record(index, name, None, None, "invalid molecule")
+            continue
+        if name_column and mol.HasProp(name_column):
+            name = mol.GetProp(name_column)
+        try:
+            value = mol.GetProp(shading_column) if shading_column else None
+            shading = _shading(value)
+        except (ValueError, KeyError):
+            yield Record(index, name, None, None, "invalid shading")
+            continue
+        yield Record(index, name, mol, shading)
+
+
+_UNSAFE = re.compile(r"[^A-Za-z0-9._-]+")
+
+
+def _filename(name: str, format: str) -> str:
+    return f"{_UNSAFE.sub('_', name).strip('.') or '_'}.{format}"
+
+
+class DirectoryWriter:
+    """Writes each depiction to its own file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+
+    def __contains__(self, filename: str) -> bool:
+        return os.path.exists(os.path.join(self.path, filename))
+
+    def write(self, filename: str, text: str):
+        # write then rename, so an interrupted run leaves no partial outputs
+        fd, tmp = tempfile.mkstemp(dir=self.path, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp, os.path.join(self.path, filename))
+
+    def close(self):
+        pass
+
+
+class ZipWriter:
+    """Writes depictions to a zip archive, appending to an existing one."""
+
+    def __init__(self, path: str):
+        self.zip = zipfile.ZipFile(path, "a", compression=zipfile.ZIP_DEFLATED)
+        self.names = set(self.zip.namelist())
+
+    def __contains__(self, filename: str) -> bool:
+        return filename in self.names
+
+    def write(self, filename: str, text: str):
+        self.zip.writestr(filename, text)
+        self.names.add(filename)
+
+    def close(self):
+        self.zip.close()
+
+
+class Progress:
+    """Counts records, and reports throughput to a stream every `interval` seconds."""
+
+    def __init__(self, stream: Optional[IO[str]], interval: float = 5.0):
+        self.stream = stream
+        self.interval = interval
+        self.rendered = self.skipped = self.failed = 0
+        self.start = self.last = time.perf_counter()
+
+    def report(self, final: bool = False):
+        now = time.perf_counter()
+        if self.stream is None or (not final and now - self.last < self.interval):
+            return
+        self.last = now
+        elapsed = now - self.start
+        rate = self.rendered / elapsed if elapsed else 0.0
+        self.stream.write(
+            f"xenopict: {self.rendered} rendered, {self.skipped} skipped,"
+            f" {self.failed} failed in {elapsed:.1f} s ({rate:.1f} molecules/s)\n"
+        )
+        self.stream.flush()
+
+
+def _parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="xenopict", description="Render a SMILES or SDF file of molecules."
+    )
+    parser.add_argument("input", help="SMILES or SDF file (optionally .gz), or - for smiles on stdin")
+    parser.add_argument("-o", "--output", required=True, help="output directory, or .zip archive")
+    parser.add_argument("--format", choices=["svg", "html"], default="svg")
+
+    records = parser.add_argument_group("records")
+    records.add_argument("--delimiter", help="column delimiter of SMILES files (default: whitespace)")
+    records.add_argument("--header", action="store_true", help="SMILES file starts with column names")
+    records.add_argument("--name-column", help="column (or SDF property) naming output files (default: record number)")
+    records.add_argument("--shading-column", help="column (or SDF property) of atom shading values")
+
+    drawing = parser.add_argument_group("drawing")
+    drawing.add_argument("--scale", type=float)
+    drawing.add_argument("--cmap", help="colormap of the shading")
+    drawing.add_argument("--diverging-cmap", action="store_true", default=None)
+    drawing.add_argument("--native-text", action="store_true", default=None)
+    drawing.add_argument("--add-atom-indices", action="store_true", default=None)
+
+    run = parser.add_argument_group("run")
+    run.add_argument("-j", "--processes", type=int, help="worker processes (default: number of cpus)")
+    run.add_argument("--chunksize", type=int, default=16)
+    run.add_argument("--overwrite", action="store_true", help="draw records whose output exists again")
+    run.add_argument("--progress", type=float, default=5.0, help="seconds between reports")
+    run.add_argument("-q", "--quiet", action="store_true")
+    return parser
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    args = _parser().parse_args(argv)
+
+    options = {
+        name: getattr(args, name)
+        for name in ["scale", "cmap", "diverging_cmap", "native_text", "add_atom_indices"]
+        if getattr(args, name) is not None
+    }
+
+    from rdkit import RDLogger
+
+    RDLogger.DisableLog("rdApp.*")  # bad records are reported below, once each
+
+    log = None if args.quiet else sys.stderr
+    progress = Progress(log, args.progress)
+
+    stream = _open(args.input)
+    if _is_sdf(args.input):
+        records = read_sdf(stream, args.name_column, args.shading_column)
+    else:
+        records = read_smiles(
+            stream, args.delimiter, args.header, args.name_column, args.shading_column
+        )
+
+    if args.output.lower().endswith(".zip"):
+        writer = ZipWriter(args.output)
+    else:
+        writer = DirectoryWriter(args.output)
+
+    claimed: set[str] = set()  # output files of the records seen in this run
+
+    def todo() -> Iterator[tuple[str, Record]]:
+        for r in records:
+            error = r.error
+            if error is None and r.shading is not None:
+                n_atoms = r.mol.GetNumAtoms()  # type: ignore
+                if len(r.shading) != n_atoms:
+                    error = f"{len(r.shading)} shading values for {n_atoms} atoms"
+            if error is not None:
+                progress.failed += 1
+                _warn(log, r, error)
+                continue
+
+            filename = _claim(claimed, r, args.format)
+            if not args.overwrite and filename in writer:
+                progress.skipped += 1  # rendered by an earlier run
+            else:
+                yield filename, r
+
+    processes = args.processes or os.cpu_count() or 1
+    executor = ProcessPoolExecutor(processes) if processes > 1 else None
+    batch_size = 4 * args.chunksize * processes
+
+    try:
+        for batch in _batches(todo(), batch_size):
+            rendered = render_many(
+                [r.mol for _, r in batch],
+                [r.shading for _, r in batch],
+                processes=processes,
+                chunksize=args.chunksize,
+                executor=executor,
+                format=args.format,
+                errors="return",
+                **options,
+            )
+            for (filename, r), text in zip(batch, rendered):
+                if isinstance(text, RenderFailure):
+                    progress.failed += 1
+                    _warn(log, r, f"cannot be drawn ({text})")
+                else:
+                    writer.write(filename, text)
+                    progress.rendered += 1
+                progress.report()
+    except KeyboardInterrupt:
+        progress.report(final=True)
+        return 130
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+        writer.close()
+        if stream is not sys.stdin.buffer:
+            stream.close()
+
+    progress.report(final=True)
+    return 0
+
+
+def _claim(claimed: set[str], record: Record, format: str) -> str:
+    """
+    The output file of a record, named after it, unless another record of this
+    run already has that file: then the record index is added, so that runs
+    over the same input always name files the same way.
+    """
+    filename = _filename(record.name, format)
+    while filename in claimed:
+        stem = filename[: -len(format) - 1]
+        filename = f"{stem}-{record.index}.{format}"
+    claimed.add(filename)
+    return filename
+
+
+def _batches(iterable: Iterator, size: int) -> Iterator[list]:
+    while batch := list(itertools.islice(iterable, size)):
+        yield batch
+
+
+def _warn(log: Optional[IO[str]], record: Record, message: str):
+    if log is not None:
+        log.write(f"xenopict: skipping record {record.index} ({record.name}): {message}\n")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
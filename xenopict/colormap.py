@@ -1,16 +1,251 @@
+"""
+Xenopict's built-in colormaps, and their compilation into lookup tables.
+
+The built-in maps (and any colormap given as a list of RGB colors) are
+compiled without importing matplotlib. Matplotlib (and colorcet) is only
+imported to resolve other colormap names, or to register the built-in
+maps with matplotlib (:func:`install_colormaps`).
+
+Importing xenopict does not register the built-in maps with matplotlib. To
+use them by name in matplotlib, call :func:`install_colormaps` first:
+
+>>> import matplotlib
+>>> _ = install_colormaps()
+>>> "xenosite" in matplotlib.colormaps
+True
+"""
 from __future__ import annotations
-from xenopict._cm_def import colormaps
-from colorcet import LinearSegmentedColormap, register_cmap
+from collections.abc import Mapping
+from typing import Any, Iterator, NamedTuple, Sequence, Union, TYPE_CHECKING
 import contextlib
+import os
+import numpy as np
+
+from ._lru import LRUCache
+
+if TYPE_CHECKING:
+    from matplotlib.colors import Colormap
+
+COLORMAPS_FILE = os.path.join(os.path.dirname(__file__), "colormaps.npz")
+
+
+class BuiltinColormaps(Mapping):
+    """
+    The built-in colormaps, by name, as read-only (N, 3) arrays of RGB floats.
+
+    Maps are stored in ``colormaps.npz`` as uint16 values scaled by 10000
+    (which is exact, because the maps are defined to four decimals), and is
+    generated by ``scripts/make_colormaps.py``, which holds their definitions.
+    The file is read on first access, and the reversed ``<name>_r`` maps are views.
+
+    >>> colormaps["xenosite"][1].tolist()
+    [0.9962, 0.9977, 1.0]
+    >>> np.shares_memory(colormaps["xenosite"], colormaps["xenosite_r"])
+    True
+    """
+
+    def __init__(self, path: str = COLORMAPS_FILE):
+        self.path = path
+        self._maps: dict[str, np.ndarray] = {}
+
+    def _load(self) -> dict[str, np.ndarray]:
+        if not self._maps:
+            with np.load(self.path) as data:
+                for name in data.files:
+                    rgb = data[name] / 10000
+                    rgb.setflags(write=False)
+                    self._maps[name] = rgb
+        return self._maps
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        maps = self._load()
+        if name in maps:
+            return maps[name]
+        if name.endswith("_r") and name[:-2] in maps:
+            return maps[name[:-2]][::-1]
+        raise KeyError(name)
 
-for k in list(colormaps):
-  colormaps[f"{k}_r"] = list(reversed(colormaps[k]))
+    def __iter__(self) -> Iterator[str]:
+        maps = self._load()
+        yield from maps
+        yield from (f"{name}_r" for name in maps)
 
-def install_colormaps() -> list[str]:  
-    for k in colormaps:
-        cmap = LinearSegmentedColormap.from_list(k, colormaps[k], len(colormaps[k]))
-        with contextlib.suppress(NameError):
-          register_cmap(k, cmap)
+    def __len__(self) -> int:
+        return 2 * len(self._load())
+
+
+colormaps = BuiltinColormaps()
+
+
+_installed = False
+
+
+def install_colormaps() -> list[str]:
+    """Register the built-in colormaps with matplotlib (once)."""
+    global _installed
+    if not _installed:
+        from colorcet import LinearSegmentedColormap, register_cmap
+
+        for k in colormaps:
+            cmap = LinearSegmentedColormap.from_list(k, colormaps[k], len(colormaps[k]))
+            with contextlib.suppress(NameError):
+              register_cmap(k, cmap)
+        _installed = True
     return list(colormaps)
 
-    
+
+class ColorLUT(NamedTuple):
+    """
+    A colormap compiled into lookup tables, so that many values are mapped at once.
+
+    Indexing follows matplotlib's :class:`Colormap`, so mapping values gives
+    exactly the colors the colormap would.
+
+    >>> lut = get_lut("xenosite")
+    >>> lut.styles([0.0, 0.5, 1.0, float("nan")])
+    ['rgb(255,255,255)', 'rgb(0,200,36)', 'rgb(254,46,0)', 'rgb(0,0,0)']
+
+    >>> from matplotlib import colormaps
+    >>> _ = install_colormaps()
+    >>> lut(0.5) == colormaps["xenosite"](0.5)
+    True
+    """
+
+    rgba: np.ndarray  # (N + 3, 4) floats: N colors, then under, over and bad
+    rgb8: np.ndarray  # (N + 3, 3) uint8
+    style: np.ndarray  # (N + 3,) "rgb(r,g,b)" strings
+
+    @property
+    def N(self) -> int:
+        return len(self.rgba) - 3
+
+    def index(self, x) -> np.ndarray:
+        """Row of the table for each value (floats in [0, 1], or integer indices)."""
+        N = self.N
+        xa = np.array(x)
+        if xa.dtype.kind == "f":
+            xa = xa.astype(float)
+            xa *= N
+            mask_bad = np.isnan(xa)
+            xa[xa < 0] = -1
+            xa[xa == N] = N - 1
+            np.clip(xa, -1, N, out=xa)
+            with np.errstate(invalid="ignore"):
+                xa = xa.astype(int)
+        else:
+            xa = xa.astype(int)
+            mask_bad = np.zeros(xa.shape, dtype=bool)
+
+        xa[xa > N - 1] = N + 1
+        xa[xa < 0] = N
+        xa[mask_bad] = N + 2
+        return xa
+
+    def __call__(self, x):
+        """RGBA color of each value: a tuple for a scalar, an array otherwise."""
+        rgba = self.rgba[self.index(x)]
+        return tuple(rgba.tolist()) if rgba.ndim == 1 else rgba
+
+    def styles(self, x) -> list[str]:
+        """The "rgb(r,g,b)" style string of each value."""
+        return self.style[self.index(x)].tolist()
+
+
+def compile_cmap(cmap: "Colormap") -> ColorLUT:
+    """Compile a matplotlib colormap into a :class:`ColorLUT`."""
+    rgba = np.concatenate(
+        [
+            cmap(np.arange(cmap.N)),
+            [cmap.get_under(), cmap.get_over(), cmap.get_bad()],
+        ]
+    )
+    return _lut_from_rgba(rgba)
+
+
+def compile_colors(colors: Sequence[Sequence[float]]) -> ColorLUT:
+    """
+    Compile a list of RGB (or RGBA) colors into a :class:`ColorLUT`, without matplotlib.
+
+    The table is the one of ``LinearSegmentedColormap.from_list(name, colors, len(colors))``,
+    which is how the built-in colormaps are registered with matplotlib.
+
+    >>> compile_colors([[1.0, 1.0, 1.0], [0.0, 0.0, 1.0]]).styles([0.2, 0.7])
+    ['rgb(255,255,255)', 'rgb(0,0,255)']
+    """
+    colors = np.array(colors, dtype=float)
+    if colors.shape[1] == 3:
+        colors = np.column_stack([colors, np.ones(len(colors))])
+
+    # matplotlib's _create_lookup_table, for equally spaced colors and N = len(colors)
+    N = len(colors)
+    if N == 1:
+        table = colors[-1:]
+    else:
+        x = np.linspace(0, 1, N) * (N - 1)
+        xind = (N - 1) * np.linspace(0, 1, N)
+        ind = np.searchsorted(x, xind)[1:-1]
+        distance = ((xind[1:-1] - x[ind - 1]) / (x[ind] - x[ind - 1]))[:, None]
+        table = np.concatenate(
+            [
+                colors[:1],
+                distance * (colors[ind] - colors[ind - 1]) + colors[ind - 1],
+                colors[-1:],
+            ]
+        )
+    table = np.clip(table, 0.0, 1.0)
+
+    # under and over default to the extreme colors, and bad is transparent
+    rgba = np.concatenate([table, table[:1], table[-1:], np.zeros((1, 4))])
+    return _lut_from_rgba(rgba)
+
+
+def _lut_from_rgba(rgba: np.ndarray) -> ColorLUT:
+    rgb8 = (rgba[:, :3] * 255).astype(np.uint8)  # truncated, like int(x * 255)
+    style = np.array(["rgb(%d,%d,%d)" % tuple(c) for c in rgb8.tolist()], dtype=object)
+    return ColorLUT(rgba, rgb8, style)
+
+
+_LUTS: LRUCache[tuple[Any, ColorLUT]] = LRUCache(maxsize=128)
+
+
+def _lut_key(cmap) -> Any:
+    if isinstance(cmap, str):
+        return cmap
+    if isinstance(cmap, (list, tuple, np.ndarray)):
+        return tuple(map(tuple, np.asarray(cmap, dtype=float).tolist()))
+    return id(cmap)
+
+
+def get_lut(cmap: Union[str, "Colormap", Sequence[Sequence[float]]]) -> ColorLUT:
+    """
+    The (cached) :class:`ColorLUT` of a colormap, given by name, as a list of
+    RGB colors, or as a matplotlib :class:`Colormap`.
+
+    Only names of colormaps that are not built in, and :class:`Colormap`
+    objects, need matplotlib.
+
+    Colormaps are compiled on first use, so changes made to a colormap after
+    that (e.g. with ``set_under``) are not seen. Lists of colors are cached by
+    their content, so equal lists share a table:
+
+    >>> get_lut([[1, 1, 1], [0, 0, 1]]) is get_lut(np.array([[1, 1, 1], [0, 0, 1]]))
+    True
+    """
+    key = _lut_key(cmap)
+    cached = _LUTS.get(key)
+    # colormap objects are keyed by id, which is only theirs while they are cached
+    if cached is None or (isinstance(key, int) and cached[0] is not cmap):
+        if isinstance(cmap, str) and cmap in colormaps:
+            compiled = compile_colors(colormaps[cmap])
+        elif isinstance(cmap, str):
+            from matplotlib import colormaps as registry  # type: ignore
+
+            install_colormaps()
+            compiled = compile_cmap(registry[cmap])
+        elif isinstance(cmap, (list, tuple, np.ndarray)):
+            compiled = compile_colors(cmap)
+        else:
+            compiled = compile_cmap(cmap)  # type: ignore
+        cached = (cmap, compiled)
+        _LUTS.put(key, cached)
+    return cached[1]
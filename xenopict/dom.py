@@ -0,0 +1,327 @@
+"""
+Pluggable DOM backends for the SVG that :class:`.Xenopict` builds and edits.
+
+A backend is a function that parses an SVG string into a document exposing the
+small subset of the :mod:`xml.dom.minidom` API that xenopict relies on
+(``createElementNS``, ``setAttribute``, ``appendChild``, ``getElementsByTagName``,
+``toxml``, ...). Two backends are registered:
+
+* ``"minidom"`` parses with :func:`xml.dom.minidom.parseString` (the default).
+* ``"etree"`` parses with the C-accelerated :class:`xml.etree.ElementTree.XMLParser`
+  into the light-weight :class:`Document` defined here, which serializes to
+  exactly the same text as minidom. Light-weight documents can also be
+  serialized incrementally to a writer (see :meth:`Node.write`).
+
+>>> doc = parse("<svg xmlns='http://www.w3.org/2000/svg'><path d='M 0,0'/></svg>", "etree")
+>>> doc.firstChild.firstChild.getAttribute("d")
+'M 0,0'
+>>> doc.toxml()
+'<?xml version="1.0" ?><svg xmlns="http://www.w3.org/2000/svg"><path d="M 0,0"/></svg>'
+"""
+from __future__ import annotations
+
+import abc
+from typing import Any, Callable, Iterator, Optional
+from xml.dom import NotFoundErr
+from xml.dom.minidom import parseString
+import xml.etree.ElementTree as ET
+
+__all__ = ["parse", "BACKENDS", "Document", "Element", "Text", "Comment"]
+
+
+_XML_NAMESPACE = "http://www.w3.org/XML/1998/namespace"
+
+
+def _escape(data: str) -> str:
+    # Same escaping as xml.dom.minidom, so that both backends serialize identically.
+    return (
+        data.replace("&", "&amp;")
+        .replace("<", "&lt;")
+        .replace('"', "&quot;")
+        .replace(">", "&gt;")
+    )
+
+
+class Node(abc.ABC):
+    ELEMENT_NODE = 1
+    TEXT_NODE = 3
+    COMMENT_NODE = 8
+    DOCUMENT_NODE = 9
+
+    __slots__ = ("parentNode", "childNodes")
+
+    nodeType: int
+    nodeName: str
+
+    def __init__(self):
+        self.parentNode: Optional[Node] = None
+        self.childNodes: list[Node] = []
+
+    @property
+    def firstChild(self) -> Optional[Node]:
+        return self.childNodes[0] if self.childNodes else None
+
+    @property
+    def lastChild(self) -> Optional[Node]:
+        return self.childNodes[-1] if self.childNodes else None
+
+    def appendChild(self, node: Node) -> Node:
+        if node.parentNode is not None:
+            node.parentNode.removeChild(node)
+        self.childNodes.append(node)
+        node.parentNode = self
+        return node
+
+    def insertBefore(self, node: Node, ref: Optional[Node]) -> Node:
+        if ref is None:
+            return self.appendChild(node)
+        if node.parentNode is not None:
+            node.parentNode.removeChild(node)
+        self.childNodes.insert(self._index(ref), node)
+        node.parentNode = self
+        return node
+
+    def removeChild(self, node: Node) -> Node:
+        del self.childNodes[self._index(node)]
+        node.parentNode = None
+        return node
+
+    def replaceChild(self, new: Node, old: Node) -> Node:
+        if new is old:
+            return old
+        if new.parentNode is not None:
+            new.parentNode.removeChild(new)
+        self.childNodes[self._index(old)] = new
+        new.parentNode = self
+        old.parentNode = None
+        return old
+
+    def _index(self, node: Node) -> int:
+        for i, c in enumerate(self.childNodes):
+            if c is node:
+                return i
+        raise NotFoundErr()
+
+    def hasChildNodes(self) -> bool:
+        return bool(self.childNodes)
+
+    def getElementsByTagName(self, name: str) -> list[Element]:
+        return [e for e in self._descendants() if e.tagName == name]
+
+    def _descendants(self) -> Iterator[Element]:
+        stack = list(reversed(self.childNodes))
+        while stack:
+            node = stack.pop()
+            if node.nodeType == Node.ELEMENT_NODE:
+                yield node  # type: ignore
+                stack.extend(reversed(node.childNodes))
+
+    @abc.abstractmethod
+    def _write(self, write: Callable[[str], Any]):
+        """Pass the serialized node, in chunks, to `write`."""
+
+    def write(self, write: Callable[[str], Any]):
+        """Serialize the node by passing it, in chunks, to `write`. Each element's
+        start tag is emitted as a single chunk."""
+        self._write(write)
+
+    def toxml(self, encoding: Optional[str] = None):
+        out: list[str] = []
+        self._write(out.append)
+        xml = "".join(out)
+        return xml.encode(encoding) if encoding else xml
+
+
+class Text(Node):
+    nodeType = Node.TEXT_NODE
+    nodeName = "#text"
+
+    __slots__ = ("data",)
+
+    def __init__(self, data: str):
+        super().__init__()
+        self.data = data
+
+    def cloneNode(self, deep: bool = False) -> Text:
+        return Text(self.data)
+
+    def _write(self, write: Callable[[str], Any]):
+        write(_escape(self.data))
+
+
+class Comment(Node):
+    nodeType = Node.COMMENT_NODE
+    nodeName = "#comment"
+
+    __slots__ = ("data",)
+
+    def __init__(self, data: str):
+        super().__init__()
+        self.data = data
+
+    def cloneNode(self, deep: bool = False) -> Comment:
+        return Comment(self.data)
+
+    def _write(self, write: Callable[[str], Any]):
+        write(f"<!--{self.data}-->")
+
+
+class Element(Node):
+    nodeType = Node.ELEMENT_NODE
+
+    __slots__ = ("tagName", "_attrs")
+
+    def __init__(self, tagName: str, attrs: Optional[dict[str, str]] = None):
+        super().__init__()
+        self.tagName = tagName
+        self._attrs: dict[str, str] = {} if attrs is None else attrs
+
+    @property
+    def nodeName(self) -> str:  # type: ignore
+        return self.tagName
+
+    @property
+    def attributes(self) -> dict[str, str]:
+        return self._attrs
+
+    def getAttribute(self, name: str) -> str:
+        return self._attrs.get(name, "")
+
+    def setAttribute(self, name: str, value: str):
+        self._attrs[name] = value
+
+    def hasAttribute(self, name: str) -> bool:
+        return name in self._attrs
+
+    def removeAttribute(self, name: str):
+        try:
+            del self._attrs[name]
+        except KeyError:
+            raise NotFoundErr() from None
+
+    def cloneNode(self, deep: bool = False) -> Element:
+        clone = Element(self.tagName, dict(self._attrs))
+        if deep:
+            for c in self.childNodes:
+                clone.appendChild(c.cloneNode(True))  # type: ignore
+        return clone
+
+    def _write(self, write: Callable[[str], Any]):
+        attrs = "".join(
+            [f' {name}="{_escape(value)}"' for name, value in self._attrs.items()]
+        )
+        if self.childNodes:
+            write(f"<{self.tagName}{attrs}>")
+            for c in self.childNodes:
+                c._write(write)
+            write(f"</{self.tagName}>")
+        else:
+            write(f"<{self.tagName}{attrs}/>")
+
+
+class Document(Node):
+    nodeType = Node.DOCUMENT_NODE
+    nodeName = "#document"
+
+    __slots__ = ()
+
+    def createElementNS(self, namespaceURI: Optional[str], qualifiedName: str):
+        return Element(qualifiedName)
+
+    def createElement(self, tagName: str):
+        return Element(tagName)
+
+    def createTextNode(self, data: str):
+        return Text(data)
+
+    def createComment(self, data: str):
+        return Comment(data)
+
+    def cloneNode(self, deep: bool = False) -> Document:
+        clone = Document()
+        if deep:
+            for c in self.childNodes:
+                clone.appendChild(c.cloneNode(True))  # type: ignore
+        return clone
+
+    def _write(self, write: Callable[[str], Any]):
+        write('<?xml version="1.0" ?>')
+        for c in self.childNodes:
+            c._write(write)
+
+    def __repr__(self):
+        return f"<{self.__class__.__module__}.{self.__class__.__name__} at {id(self):#x}>"
+
+
+class _TreeBuilder:
+    """ElementTree parser target that builds a :class:`Document`, restoring the
+    prefixed names and namespace declarations that ElementTree resolves away."""
+
+    def __init__(self):
+        self.document = Document()
+        self.stack: list[Node] = [self.document]
+        self.prefixes: dict[str, str] = {_XML_NAMESPACE: "xml"}
+        self.declarations: list[tuple[str, str]] = []
+
+    def _qname(self, name: str) -> str:
+        if name[0] != "{":
+            return name
+        uri, local = name[1:].split("}", 1)
+        prefix = self.prefixes.get(uri, "")
+        return f"{prefix}:{local}" if prefix else local
+
+    def start_ns(self, prefix: str, uri: str):
+        self.prefixes[uri] = prefix
+        self.declarations.append((f"xmlns:{prefix}" if prefix else "xmlns", uri))
+
+    def start(self, tag: str, attrib: dict[str, str]):
+        attrs = dict(self.declarations)
+        self.declarations = []
+        for name, value in attrib.items():
+            attrs[self._qname(name)] = value
+
+        elem = Element(self._qname(tag), attrs)
+        self.stack[-1].appendChild(elem)
+        self.stack.append(elem)
+
+    def end(self, tag: str):
+        self.stack.pop()
+
+    def data(self, data: str):
+        parent = self.stack[-1]
+        if parent.childNodes and parent.childNodes[-1].nodeType == Node.TEXT_NODE:
+            parent.childNodes[-1].data += data  # type: ignore
+        else:
+            parent.appendChild(Text(data))
+
+    def comment(self, data: str):
+        self.stack[-1].appendChild(Comment(data))
+
+    def close(self) -> Document:
+        return self.document
+
+
+def parse_etree(svg: str) -> Document:
+    """Parse svg with ElementTree's (expat) parser into a light-weight :class:`Document`."""
+    parser = ET.XMLParser(target=_TreeBuilder())
+    parser.feed(svg)
+    return parser.close()
+
+
+BACKENDS: dict[str, Callable[[str], object]] = {
+    "minidom": parseString,
+    "etree": parse_etree,
+}
+
+
+def parse(svg: str, backend: str = "minidom"):
+    """
+    Parse svg into a document with the named backend (see :data:`BACKENDS`).
+    """
+    try:
+        parser = BACKENDS[backend]
+    except KeyError:
+        raise ValueError(
+            f"Unknown DOM backend '{backend}', expected one of {list(BACKENDS)}."
+        ) from None
+    return parser(svg)
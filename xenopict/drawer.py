@@ -1,31 +1,33 @@
 from __future__ import annotations
 import numpy as np
-from xml.dom.minidom import parseString, Element
+from xml.dom.minidom import Element
 import contextlib
 from six.moves.collections_abc import Sequence, Mapping  # type: ignore
-from rdkit.Chem.Draw import rdMolDraw2D, rdDepictor
 from rdkit.Chem.rdchem import Mol
 from rdkit.Chem import MolFromSmiles, MolFromSmarts  # type: ignore
-from .colormap import install_colormaps
+from .colormap import install_colormaps, get_lut
 from .plotdot import PlotDot
+from .dom import parse as parse_svg, Node as LightNode
+from .cache import DepictionCache, depiction_key
+from .timing import phase, timed
+from .sprite import GlyphSprite
 
 from urllib.parse import quote
 from collections import defaultdict
-from typing import Optional, Union
-import simplejson as json
+from typing import NamedTuple, Optional, Union, TYPE_CHECKING
+import functools
 import hashlib
 import re
 import os
+import time
 
 from warnings import warn
 
-with contextlib.suppress(ImportError):
+# rdkit drawing, shapely, simplejson and matplotlib are imported where they
+# are used, so that importing xenopict stays fast.
+if TYPE_CHECKING:
     from matplotlib.colors import Colormap
 
-from shapely.geometry import LineString, Point
-
-install_colormaps()
-
 __all__ = ["shaded_svg", "Xenopict"]
 
 _DEBUG = os.environ.get("XENOPICT_DEBUG", False)
@@ -48,6 +50,19 @@ if MINOR_VERSION >= 9:
 SVG = str
 
 
+def _changes(method):
+    """Count the calls of a method that changes the depiction (in `_revision`),
+    so that renderings of it can be cached until it changes."""
+
+    @functools.wraps(method)
+    def changing(self, *args, **kwargs):
+        out = method(self, *args, **kwargs)
+        self.__dict__["_revision"] = self.__dict__.get("_revision", 0) + 1
+        return out
+
+    return changing
+
+
 def _style2dict(s: str) -> dict[str, str]:
     if not s:
         return {}
@@ -136,6 +151,25 @@ class Xenopict:
 
     >>> drawer.svgdom
     <xml.dom.minidom.Document ...>
+
+    A lighter, faster DOM can be selected with the `dom_backend` option
+    (see :mod:`xenopict.dom`). It supports the same subset of the minidom API
+    that xenopict uses, and serializes to the same SVG:
+
+    >>> fast = Xenopict(mol, dom_backend="etree")
+    >>> fast.svgdom
+    <xenopict.dom.Document ...>
+    >>> fast.to_svg() == Xenopict(mol).to_svg()
+    True
+
+    The `native_text` option draws atom labels as svg <text> elements instead of
+    glyph outlines, which is much smaller (but rendered with the viewer's fonts):
+
+    >>> len(Xenopict(mol, native_text=True).to_svg()) < len(Xenopict(mol).to_svg())
+    True
+
+    With the `glyph_sprite` option, text glyphs reference a shared, external
+    sprite file instead of being stored in every svg (see :mod:`xenopict.sprite`).
     """
 
     down_scale: float = 0.7
@@ -150,7 +184,24 @@ class Xenopict:
     #kekulize : bool = False
     dummies_are_attachments : bool = False
     plot_dot: PlotDot = PlotDot()
-    cmap: Union[str, "Colormap"] = "xenosite"
+    cmap: Union[str, "Colormap", Sequence[Sequence[float]]] = "xenosite"
+    dom_backend: str = "minidom"
+    cache: Optional[DepictionCache] = None
+    glyph_sprite: Optional[GlyphSprite] = None
+    native_text: bool = False
+
+    # options that change the base depiction, and so are part of its cache key
+    depiction_options: tuple[str, ...] = (
+        "scale",
+        "add_atom_indices",
+        "add_bond_indices",
+        "optimize_svg",
+        "embed_script",
+        "dummies_are_attachments",
+        "dom_backend",
+        "glyph_sprite",
+        "native_text",
+    )
 
     def __init__(
         self, input_mol: Union[str, Mol, "Xenopict"], **kwargs
@@ -171,40 +222,105 @@ class Xenopict:
         self.groups: dict[str, Element] = {}
         self.draw_mol()
 
+    @classmethod
+    def render_many(
+        cls,
+        mols,
+        atom_shadings=None,
+        bond_shadings=None,
+        **options,
+    ):
+        """
+        Render many molecules over a process pool, yielding SVG strings in input order.
+
+        This is a thin wrapper around :func:`xenopict.batch.render_many`, drawing
+        each molecule with this class.
+
+        >>> svgs = list(Xenopict.render_many(["CCO", "CCN"], processes=1))
+        >>> len(svgs)
+        2
+        """
+        from .batch import render_many
+
+        return render_many(
+            mols, atom_shadings, bond_shadings, xenopict_class=cls, **options
+        )
+
+    @timed("draw_mol")
+    @_changes
     def draw_mol(self, mol: Optional[Mol] = None):
         self.mol: Mol = mol or self.mol
+        self._init_adjacency()
 
         self._filter = None
-        d2d = rdMolDraw2D.MolDraw2DSVG(-1, -1)
-
-        rdDepictor.SetPreferCoordGen(False)
-        dopt = d2d.drawOptions()
-        dopt.fixedBondLength = self.scale
-        dopt.scalingFactor = self.scale
-        dopt.fixedScale = True
-        dopt.addAtomIndices = self.add_atom_indices
-        dopt.addBondIndices = self.add_bond_indices
-        dopt.dummiesAreAttachments = self.dummies_are_attachments
-        dopt.padding = 0.2
-        dopt.useBWAtomPalette()
-
-        try:
-          dopt.prepareMolsBeforeDrawing = True
-          d2d.DrawMolecule(self.mol)
-        except RuntimeError:
-          dopt.prepareMolsBeforeDrawing = False
-          d2d.DrawMolecule(self.mol)
-
-
-        self.coords = np.array(
-            [list(d2d.GetDrawCoords(i)) for i in range(self.mol.GetNumAtoms())]
-        )
-        d2d.FinishDrawing()
+        self._glyphs: dict[str, str] = {}
+        self.optimize_stats: list[OptimizeStats] = []
+
+        cache_key = None
+        if self.cache is not None:
+            with phase("cache"):
+                cache_key = depiction_key(self)
+                entry = self.cache.get(cache_key)
+            if entry is not None:
+                self._load_depiction(entry)
+                return
+
+        with phase("layout"):
+            from rdkit.Chem.Draw import rdMolDraw2D, rdDepictor
+
+            if self.native_text:
+                # without freetype, rdkit draws labels as <text> instead of glyph outlines
+                d2d = rdMolDraw2D.MolDraw2DSVG(-1, -1, -1, -1, True)
+            else:
+                d2d = rdMolDraw2D.MolDraw2DSVG(-1, -1)
+
+            rdDepictor.SetPreferCoordGen(False)
+            dopt = d2d.drawOptions()
+            dopt.fixedBondLength = self.scale
+            dopt.scalingFactor = self.scale
+            dopt.fixedScale = True
+            dopt.addAtomIndices = self.add_atom_indices
+            dopt.addBondIndices = self.add_bond_indices
+            dopt.dummiesAreAttachments = self.dummies_are_attachments
+            dopt.padding = 0.2
+            dopt.useBWAtomPalette()
+
+            try:
+              dopt.prepareMolsBeforeDrawing = True
+              d2d.DrawMolecule(self.mol)
+            except RuntimeError:
+              dopt.prepareMolsBeforeDrawing = False
+              d2d.DrawMolecule(self.mol)
+
+            self.coords = np.array(
+                [list(d2d.GetDrawCoords(i)) for i in range(self.mol.GetNumAtoms())]
+            )
+            d2d.FinishDrawing()
+
+            svg = d2d.GetDrawingText()
+
+        with phase("parse"):
+            self.svgdom = dom = parse_svg(str(svg), self.dom_backend)
+
+        self._restructure(dom)
+
+        if self.glyph_sprite is not None:
+            self._use_glyph_sprite()
+
+        if self.optimize_svg:
+            self._optimize_svg(self.svgdom)
 
-        svg = d2d.GetDrawingText()
+        self.reframe()
+
+        if cache_key is not None:
+            with phase("cache"):
+                self.cache.put(cache_key, self._dump_depiction())  # type: ignore
 
-        self.svgdom = dom = parseString(str(svg))
+        return
 
+    @timed("restructure")
+    def _restructure(self, dom):
+        """Reorganize rdkit's drawing into xenopict's layer groups."""
         # remove RDKIT namespace, because this xml is heavily modified
         self.svgdom.firstChild.removeAttribute("xmlns:rdkit")
 
@@ -248,6 +364,15 @@ class Xenopict:
                     self.groups["lines"].firstChild.appendChild(c)  # type: ignore
                 else:
                     self.groups["text"].firstChild.appendChild(c)  # type: ignore
+            elif c.nodeName == "text":
+                s = _style2dict(c.getAttribute("style"))
+                c.removeAttribute("style")
+                if _text_style(s):
+                    c.setAttribute("style", _dict2style(_text_style(s)))
+                self.groups["text"].firstChild.setAttribute(  # type: ignore
+                    "style", f"font-family:{s.get('font-family', 'sans-serif')}"
+                )
+                self.groups["text"].firstChild.appendChild(c)  # type: ignore
             elif not c.TEXT_NODE:
                 self.groups["text"].appendChild(c)
 
@@ -261,89 +386,203 @@ class Xenopict:
         for value in self.groups.values():
             self.svgdom.firstChild.appendChild(value)
 
-        json.encoder.FLOAT_REPR = lambda o: format(o, ".1f")  # type: ignore
-        json.encoder.c_make_encoder = None  # type: ignore
-
-        JSON = {"coords": self.coords.tolist(), "scale": self.scale}
-        JSON = json.dumps(JSON, use_decimal=True)
         if self.embed_script:
+            import simplejson as json
+
+            json.encoder.FLOAT_REPR = lambda o: format(o, ".1f")  # type: ignore
+            json.encoder.c_make_encoder = None  # type: ignore
+
+            JSON = {"coords": self.coords.tolist(), "scale": self.scale}
+            JSON = json.dumps(JSON, use_decimal=True)
             script = dom.createElementNS("http://www.w3.org/2000/svg", "script")
             script.setAttribute("type", "application/json")
             script.appendChild(dom.createTextNode(JSON))
             self.svgdom.firstChild.appendChild(script)
 
-        if self.optimize_svg:
-            self._optimize_svg(self.svgdom)
+    def _init_adjacency(self):
+        """Bond endpoints and CSR adjacency of the molecule, as arrays.
 
-        self.reframe()
+        The neighbors of atom `a` are ``_adj_indices[_adj_indptr[a]:_adj_indptr[a + 1]]``
+        (in increasing order), bonded by ``_adj_bonds`` at the same positions.
+        """
+        self._bond_atoms = np.array(
+            [(b.GetBeginAtomIdx(), b.GetEndAtomIdx()) for b in self.mol.GetBonds()],
+            dtype=int,
+        ).reshape(-1, 2)
+        self._adj_indptr, self._adj_indices, self._adj_bonds = _csr(
+            self.mol.GetNumAtoms(), self._bond_atoms
+        )
 
-        return
+    def _bond_idx(self, bonds: Sequence[Sequence[AtomIdx]]) -> np.ndarray:
+        """Indices of the bonds between each pair of atoms."""
+        pairs = np.asarray(bonds, dtype=int).reshape(-1, 2)
+        n = len(self._adj_indptr) - 1
+
+        # CSR entries are sorted by (atom, neighbor), so their keys are sorted
+        src = np.repeat(np.arange(n), np.diff(self._adj_indptr))
+        keys = src * n + self._adj_indices
+        query = pairs[:, 0] * n + pairs[:, 1]
+
+        pos = np.minimum(np.searchsorted(keys, query), len(keys) - 1)
+        missing = (keys[pos] != query) if len(keys) else np.ones(len(query), bool)
+        if missing.any():
+            raise ValueError(f"No bond between atoms {pairs[missing][0].tolist()}.")
+        return self._adj_bonds[pos]
+
+    @timed("glyph_sprite")
+    def _use_glyph_sprite(self):
+        """Replace the text glyphs by references to the glyph sprite."""
+        sprite: GlyphSprite = self.glyph_sprite  # type: ignore
+        text = self.groups["text"].firstChild
+        paths = [e for e in text.childNodes if e.nodeName == "path"]
+        ds = _relative_paths([e.getAttribute("d") for e in paths])
+
+        for elem, d in zip(paths, ds):
+            x, y, symbol = _d_symbol(d)
+            glyph_id = sprite.add(symbol)
+            self._glyphs[glyph_id] = symbol
+
+            use = self.svgdom.createElementNS("http://www.w3.org/2000/svg", "use")
+            use.setAttribute("href", sprite.url(glyph_id))
+            use.setAttribute("x", x)
+            use.setAttribute("y", y)
+            if elem.hasAttribute("class"):
+                use.setAttribute("class", elem.getAttribute("class"))
+            text.replaceChild(use, elem)
+
+    def _dump_depiction(self) -> dict:
+        return {
+            "svg": self.svgdom.toxml(),
+            "coords": self.coords.tolist(),
+            "stroke_width": self.stroke_width,
+            "glyphs": self._glyphs,
+        }
 
-    def _optimize_svg(self, svgdom):
-        _optimize_svg(svgdom)
+    @timed("load_depiction")
+    def _load_depiction(self, entry: dict):
+        self.svgdom = parse_svg(entry["svg"], self.dom_backend)
+        self.groups = _find_groups(self.svgdom)
+        self.coords = np.array(entry["coords"])
+        self._glyphs = entry.get("glyphs", {})
+        if self.glyph_sprite is not None:
+            self.glyph_sprite.update(self._glyphs)
+        self.stroke_width = entry["stroke_width"]
+
+    @timed("optimize")
+    def _optimize_svg(self, svgdom, paths=None) -> "OptimizeStats":
+        # the unique shapes of svgdom, so that new paths are optimized on their own
+        index = getattr(self, "_shapes", None)
+        if paths is None or index is None or index[0] is not svgdom:
+            index = self._shapes = (svgdom, {})
+            paths = None
+        stats = _optimize_svg(svgdom, paths, index[1])
+        self.optimize_stats.append(stats)
+        del self.optimize_stats[:-OPTIMIZE_STATS_KEPT]
+        return stats
 
     def get_cmap(self) -> "Colormap":
         from matplotlib import colormaps  # type: ignore
+        from matplotlib.colors import LinearSegmentedColormap  # type: ignore
 
+        install_colormaps()
         cmap = self.cmap
-        return colormaps[cmap] if isinstance(cmap, str) else cmap
+        if isinstance(cmap, str):
+            return colormaps[cmap]
+        if isinstance(cmap, (list, tuple, np.ndarray)):
+            return LinearSegmentedColormap.from_list("custom", cmap, len(cmap))
+        return cmap
 
+    @timed("copy")
     def copy(self) -> "Xenopict":
-        return Xenopict(self.mol)
+        """
+        Copy the depiction, with its instance options, by cloning its svg dom instead
+        of redrawing the molecule. This makes it cheap to draw once and shade many times.
+
+        >>> base = Xenopict("CCO", scale=30)
+        >>> shaded = base.copy().shade([1, 0, -1])
+        >>> shaded.scale
+        30
+        >>> base.to_svg() == Xenopict("CCO", scale=30).to_svg()
+        True
+        """
+        state = self.__dict__.copy()
+        for key, value in state.items():
+            if isinstance(value, (list, dict, set, np.ndarray)):
+                state[key] = value.copy()
+
+        state["svgdom"] = dom = self.svgdom.cloneNode(True)
+        state["groups"] = _find_groups(dom)
+
+        clone = object.__new__(type(self))
+        clone.__dict__ = state
+        return clone
 
     def color_map(self, color):
         if self.diverging_cmap:
-            color = (color + 1.0) / 2
-        return self.get_cmap()(color)  # type: ignore
+            color = (np.asarray(color) + 1.0) / 2
+        return get_lut(self.cmap)(color)
+
+    def color_styles(self, colors: Sequence[float]) -> list[str]:
+        """
+        The fill style ("rgb(r,g,b)") of each shading value, mapped through the colormap at once.
+
+        >>> Xenopict("C").color_styles([0.0, 1.0])
+        ['rgb(255,255,255)', 'rgb(254,46,0)']
+        """
+        colors = np.asarray(colors, dtype=float)
+        if self.diverging_cmap:
+            colors = (colors + 1.0) / 2
+        return get_lut(self.cmap).styles(colors)
 
     def _shapely_from_atoms(
         self,
         atoms: Sequence[AtomIdx],
         bonds: Optional[Sequence[Sequence[AtomIdx]]] = None,
         twohop=False,
+        origin: Optional[np.ndarray] = None,
     ):
+        # Optionally build the shape relative to origin, so the paths of identical
+        # shapes at different positions are identical (and can share a symbol).
+        coords = self.coords if origin is None else self.coords - origin
 
-        atom_set = set(atoms)
-
-        out = LineString()  # empty set
-
-        for a in atoms:
-            xy = self.coords[a]
-            out = out.union(Point(*xy))  # type: ignore
-
-        # limit to bonds provided in args (default: obtain bonds from atoms)
-        _bonds: Sequence[Sequence[AtomIdx]] = bonds or [
-            (b.GetBeginAtomIdx(), b.GetEndAtomIdx()) for b in self.mol.GetBonds()
-        ]
+        n = self.mol.GetNumAtoms()
+        in_set = np.zeros(n, dtype=bool)
+        in_set[np.asarray(atoms, dtype=int)] = True
 
-        # filter out all bonds where both ends are not in atom_set
-        _bonds = [b for b in _bonds if b[0] in atom_set and b[1] in atom_set]
+        # limit to bonds provided in args (default: all bonds of the molecule)
+        if bonds:
+            indptr, indices, _ = _csr(n, np.asarray(bonds, dtype=int).reshape(-1, 2))
+        else:
+            indptr, indices = self._adj_indptr, self._adj_indices
 
-        for a1, a2 in _bonds:
-            c1 = self.coords[a1]
-            c2 = self.coords[a2]
-            out = out.union(LineString([c1, c2]))
+        # directed edges, sorted by src, where both ends are in atoms
+        src = np.repeat(np.arange(n), np.diff(indptr))
+        keep = in_set[src] & in_set[indices]
+        src, dst = src[keep], indices[keep]
 
+        segments = [np.stack([src, dst], axis=1)]
         if twohop:
-            neighborhood = defaultdict(set)
-            for a1, a2 in _bonds:
-                neighborhood[a1].add(a2)
-                neighborhood[a2].add(a1)
-
-            twohop = defaultdict(set)
-            for a in neighborhood:
-                for n in neighborhood[a]:
-                    for m in neighborhood[n]:
-                        twohop[a].add(m)
-
-            for a1, a2s in twohop.items():
-                c1 = self.coords[a1]
-                for a2 in a2s:
-                    c2 = self.coords[a2]
-                    out = out.union(LineString([c1, c2]))
-
-        return out
+            segments.append(_neighbor_pairs(src, dst))
+        segments = np.concatenate(segments)
+        segments = np.unique(segments[segments[:, 0] < segments[:, 1]], axis=0)
+
+        import shapely
+
+        # Build the whole skeleton at once with shapely's vectorized constructors
+        # (unioning one piece at a time is quadratic). Atoms at the end of a
+        # segment are already covered by it, so only isolated atoms are points.
+        isolated = in_set.copy()
+        isolated[segments.ravel()] = False
+        parts = np.concatenate(
+            [
+                shapely.points(coords[isolated]),
+                shapely.linestrings(coords[segments]) if len(segments) else [],
+            ]
+        )
+        return shapely.geometrycollections(parts)
 
+    @timed("mark_substructure")
+    @_changes
     def mark_substructure(
         self,
         atoms: Sequence[AtomIdx],
@@ -352,21 +591,30 @@ class Xenopict:
         if not atoms:
             return self
 
-        substr = self._shapely_from_atoms(atoms, substr_bonds, twohop=True).buffer(
-            self.scale * self.mark_down_scale, resolution=self.shapely_resolution
-        )
-        d = _poly_to_path(substr)
+        origin = self.coords[atoms[0]]
+        with phase("geometry"):
+            substr = _buffer(
+                self._shapely_from_atoms(atoms, substr_bonds, twohop=True, origin=origin),
+                self.scale * self.mark_down_scale,
+                self.shapely_resolution,
+            )
+            d = _poly_to_path(substr, origin)
 
         mark = self.svgdom.createElementNS("http://www.w3.org/2000/svg", "path")
         mark.setAttribute("d", d)
-        self._append_mark(mark)
+        mark = self._append_mark(mark)
+
+        if self.optimize_svg:
+            self._optimize_svg(self.svgdom, [mark])
         return self
 
     def _append_mark(self, mark):
         self._init_mark_layers()
-        self.groups["mark"].firstChild.appendChild(mark.cloneNode(True))  # type: ignore
+        return self.groups["mark"].firstChild.appendChild(mark.cloneNode(True))  # type: ignore
         # self.groups["halo"].appendChild(mark.cloneNode(True))
 
+    @timed("shade_substructure")
+    @_changes
     def shade_substructure(
         self,
         substrs_by_atoms: Sequence[Sequence[AtomIdx]],
@@ -394,9 +642,6 @@ class Xenopict:
             shading
         ), "Number of substructures must equal number of shading values."
 
-        dots = self.plot_dot.all_dots(shading)
-        shapes = []
-
         if substrs_bonds:
             assert len(substrs_by_atoms) == len(
                 substrs_bonds
@@ -407,47 +652,68 @@ class Xenopict:
         else:
             _substrs_bonds = [None] * len(substrs_by_atoms)
 
-        for atoms, dot, bonds in zip(substrs_by_atoms, dots, _substrs_bonds):
-            if not atoms:
-                continue
-            substr = self._shapely_from_atoms(atoms, bonds)
-            shapes.extend((radius, color, substr) for radius, color in dot)
-
-        self.plot_dot._sort_dots(shapes)
-
-        for radius, color, substr in shapes:
-            color = self.color_map(color)
-            fill = self._color_to_style(color)
-            d = _poly_to_path(
-                substr.buffer(
-                    self.scale * radius * 0.9, resolution=self.shapely_resolution
+        shapes = {}
+        with phase("geometry"):
+            for i, (atoms, bonds) in enumerate(zip(substrs_by_atoms, _substrs_bonds)):
+                if not atoms:
+                    continue
+                origin = self.coords[atoms[0]]
+                shapes[i] = self._shapely_from_atoms(atoms, bonds, origin=origin), origin
+
+        dots = self.plot_dot.dots_array(shading)
+        drawn = np.isin(dots.index, list(shapes))
+
+        shades = []
+
+        for radius, fill, i in zip(
+            dots.radius[drawn].tolist(),
+            self.color_styles(dots.color[drawn]),
+            dots.index[drawn].tolist(),
+        ):
+            substr, origin = shapes[i]
+            with phase("buffer"):
+                d = _poly_to_path(
+                    _buffer(substr, self.scale * radius * 0.9, self.shapely_resolution),
+                    origin,
                 )
-            )
 
             shade = self.svgdom.createElementNS("http://www.w3.org/2000/svg", "path")
             shade.setAttribute("d", d)
             shade.setAttribute("style", f"fill:{fill}")
             self.groups["shading"].appendChild(shade)
+            shades.append(shade)
 
+        if self.optimize_svg and shades:
+            self._optimize_svg(self.svgdom, shades)
         return self
 
+    @timed("pickle")
     def __getstate__(self):
         state = self.__dict__.copy()
         del state["groups"]
+        state.pop("cache", None)  # caches are not part of the depiction
+        state.pop("_shapes", None)  # rebuilt by the next optimization
         # Do not uniquify id/href when pickling
         state["svgdom"] = self.to_svg(uniquify_internal_refs=False)
         return state
 
+    @timed("unpickle")
     def __setstate__(self, state):
-        state["svgdom"] = dom = parseString(state["svgdom"])
-        state["groups"] = {
-            g.getAttribute("class"): g for g in dom.getElementsByTagName("g")
-        }
+        backend = state.get("dom_backend", type(self).dom_backend)
+        state["svgdom"] = dom = parse_svg(state["svgdom"], backend)
+        state["groups"] = _find_groups(dom)
+        # pickled by an older version
+        state.setdefault("optimize_stats", [])
+        state.setdefault("_glyphs", {})
         self.__dict__ = state
+        if "_adj_indptr" not in state:
+            self._init_adjacency()
 
     def _color_to_style(self, color: Sequence[float]):
         return "rgb(%g,%g,%g)" % tuple(int(x * 255) for x in color[:3])
 
+    @timed("mark_atoms")
+    @_changes
     def mark_atoms(self, atoms: Sequence[AtomIdx]) -> "Xenopict":
         def marks():
             for a in atoms:
@@ -462,6 +728,8 @@ class Xenopict:
 
         return self
 
+    @timed("shade")
+    @_changes
     def shade(
         self,
         atom_shading: Optional[AtomShading] = None,
@@ -472,9 +740,11 @@ class Xenopict:
         if atom_shading is not None and bond_shading is not None:
             scaling = self.scale * 0.8
 
-        circles = []
+        tables = []
         if atom_shading is not None:
-            circles.extend(self.plot_dot(atom_shading, self.coords))
+            tables.append(
+                self.plot_dot.dots_array(atom_shading, self.coords, sort=False)
+            )
 
         if bond_shading is not None:
             atom1 = bond_shading[0]
@@ -483,12 +753,19 @@ class Xenopict:
                 np.take(self.coords, atom1, axis=0)  # type: ignore
                 + np.take(self.coords, atom2, axis=0)  # type: ignore
             ) / 2
-            circles.extend(self.plot_dot(bond_shading[2], bond_coords))
+            tables.append(
+                self.plot_dot.dots_array(bond_shading[2], bond_coords, sort=False)
+            )
 
-        self.plot_dot._sort_dots(circles)
+        dots = self.plot_dot.sort_dots_array(*tables)
 
-        for radius, color, xy in circles:
-            c = self._circle(xy, radius * scaling, self.color_map(color))
+        for radius, fill, x, y in zip(
+            dots.radius.tolist(),
+            self.color_styles(dots.color),
+            dots.x.tolist(),  # type: ignore
+            dots.y.tolist(),  # type: ignore
+        ):
+            c = self._circle((x, y), radius * scaling, style={"fill": fill})
             self.groups["shading"].appendChild(c)
 
         return self
@@ -506,6 +783,8 @@ class Xenopict:
         xy1 = xy1 - self.scale * padding
         return xy1[0], xy1[1], wh[0], wh[1]
 
+    @timed("reframe")
+    @_changes
     def reframe(self, padding=1.5, atoms=None) -> "Xenopict":
         x, y, w, h = self._frame(padding, atoms)
         self.svgdom.firstChild.setAttribute(
@@ -538,6 +817,7 @@ class Xenopict:
     def _repr_svg_(self):
         return self.to_svg()
 
+    @timed("to_svg")
     def to_svg(
         self,
         uniquify_internal_refs: bool = True,
@@ -550,10 +830,11 @@ class Xenopict:
         clashes in any documents into which svgs are embedded.
         """
 
-        if not uniquify_internal_refs:
-            return self.svgdom.toxml()
+        with phase("serialize"):
+            svg = self.svgdom.toxml()
 
-        svg = self.svgdom.toxml()
+        if not uniquify_internal_refs:
+            return svg
 
         md5 = hashlib.md5(svg.encode("utf-8")).hexdigest()[:hash_length]
 
@@ -567,20 +848,67 @@ class Xenopict:
         #     if i := e.getAttribute("href"):
         #         e.setAttribute("href", f"{i}_u_{md5}")
 
-        def addhash(matchobj):
-            return f'{matchobj.group(0)[:-1]}_xeno_{md5}"'
-
-        svg = re.sub(r'href=".+?"|id=".+?"', addhash, svg)
+        svg = _uniquify_refs(svg, md5)
 
         # add in any SVG attribues
         if svg_attributes:
-            attr = " ".join(
-                [f"{key}='{value}'" for key, value in svg_attributes.items()]
-            )
-            svg = svg.replace("<svg ", f"<svg {attr} ", 1)
+            svg = _add_svg_attributes(svg, svg_attributes)
 
         return svg
 
+    @timed("write_svg")
+    def write_svg(
+        self,
+        writer,
+        uniquify_internal_refs: bool = True,
+        hash_length: int = 10,
+        svg_attributes: dict = {},
+        encoding: Optional[str] = None,
+    ):
+        """
+        Write the same svg as :meth:`to_svg` to `writer`, a file-like object. If
+        `encoding` is given, encoded bytes are written instead of strings.
+
+        With the light-weight DOM backends (see :mod:`xenopict.dom`), the svg is
+        streamed to the writer in chunks, without ever building the whole string.
+
+        >>> import io
+        >>> x = Xenopict("CCO", dom_backend="etree")
+        >>> f = io.BytesIO()
+        >>> x.write_svg(f, encoding="utf-8")
+        >>> f.getvalue().decode("utf-8") == x.to_svg()
+        True
+        """
+        write = writer.write
+        if encoding:
+            write = lambda chunk: writer.write(chunk.encode(encoding))
+
+        dom = self.svgdom
+        if not isinstance(dom, LightNode):
+            write(self.to_svg(uniquify_internal_refs, hash_length, svg_attributes))
+            return
+
+        if not uniquify_internal_refs:
+            dom.write(write)
+            return
+
+        md5 = hashlib.md5()
+        dom.write(lambda chunk: md5.update(chunk.encode("utf-8")))
+        digest = md5.hexdigest()[:hash_length]
+
+        attributes = svg_attributes
+
+        def rewrite(chunk):
+            nonlocal attributes
+            chunk = _uniquify_refs(chunk, digest)
+            if attributes and "<svg " in chunk:
+                chunk = _add_svg_attributes(chunk, attributes)
+                attributes = {}
+            write(chunk)
+
+        dom.write(rewrite)
+
+    @timed("to_html")
     def to_html(self, svg_datauri=False) -> str:
         """Return the HTML string depicting the molecule, embedding the
         SVG element within a white-background styled div. Optionally,
@@ -612,6 +940,7 @@ class Xenopict:
 
         return getattr(self.mol, key)
 
+    @_changes
     def halo(self) -> "Xenopict":
         warn(
             "The halo method is depreciated and will be automatically applied in future version.",
@@ -663,6 +992,8 @@ class Xenopict:
 
         return c
 
+    @timed("filter")
+    @_changes
     def filter(
         self, atoms: Sequence[AtomIdx], bonds: Optional[Sequence[Sequence[AtomIdx]]]
     ) -> "Xenopict":
@@ -671,11 +1002,7 @@ class Xenopict:
         elems = list(self.groups["lines"].firstChild.childNodes)  # type: ignore
         elems += list(self.groups["text"].firstChild.childNodes)  # type: ignore
 
-        _bonds = (
-            {self.mol.GetBondBetweenAtoms(*b).GetIdx() for b in bonds}
-            if bonds
-            else set()
-        )
+        _bonds = set(self._bond_idx(bonds).tolist()) if bonds else set()
 
         for elem in elems:
             cls = set(elem.getAttribute("class").split())
@@ -746,7 +1073,106 @@ class Xenopict:
         self.groups["overlay"].appendChild(m)
 
 
-def _poly_to_path(shape):
+_LAYERS = ("shading", "mol_halo", "lines", "text", "overlay", "halo", "mark")
+
+
+def _find_groups(svgdom) -> dict:
+    """Recover the :attr:`Xenopict.groups` of a parsed depiction from the layers' classes."""
+    found = {}
+    for tag in ("g", "use"):
+        for e in svgdom.getElementsByTagName(tag):
+            if (cls := e.getAttribute("class")) in _LAYERS:
+                found[cls] = e
+    return {name: found[name] for name in _LAYERS if name in found}
+
+
+# the style of rdkit's <text> labels that is not already the svg default
+_TEXT_DEFAULTS = {
+    "font-style": "normal",
+    "font-weight": "normal",
+    "fill-opacity": "1",
+    "stroke": "none",
+    "text-anchor": "start",
+    "fill": "#000000",
+}
+
+
+def _text_style(style: dict) -> dict:
+    """
+    The style of a <text> label, without defaults and the font family (which is
+    set on the whole text layer). Like glyph paths, labels are not stroked, except
+    by halos.
+
+    >>> _text_style({"font-size": "11px", "font-family": "sans-serif", "fill": "#000000"})
+    {'font-size': '11px'}
+    """
+    return {
+        k: v
+        for k, v in style.items()
+        if k != "font-family" and _TEXT_DEFAULTS.get(k) != v
+    }
+
+
+# ids, and hrefs to them (but not hrefs to other documents, like glyph sprites)
+_INTERNAL_REF = re.compile(r'href="#.+?"|id=".+?"')
+
+
+def _uniquify_refs(svg: str, md5: str) -> str:
+    def addhash(matchobj):
+        return f'{matchobj.group(0)[:-1]}_xeno_{md5}"'
+
+    return _INTERNAL_REF.sub(addhash, svg)
+
+
+def _add_svg_attributes(svg: str, svg_attributes: dict) -> str:
+    attr = " ".join([f"{key}='{value}'" for key, value in svg_attributes.items()])
+    return svg.replace("<svg ", f"<svg {attr} ", 1)
+
+
+def _csr(n_atoms: int, bond_atoms: np.ndarray):
+    """CSR adjacency (indptr, neighbor atoms, bond indices) of bonds given as atom pairs."""
+    src = np.concatenate([bond_atoms[:, 0], bond_atoms[:, 1]])
+    dst = np.concatenate([bond_atoms[:, 1], bond_atoms[:, 0]])
+    bond = np.tile(np.arange(len(bond_atoms)), 2)
+
+    order = np.lexsort((dst, src))
+    indptr = np.zeros(n_atoms + 1, dtype=int)
+    np.cumsum(np.bincount(src, minlength=n_atoms), out=indptr[1:])
+    return indptr, dst[order], bond[order]
+
+
+def _neighbor_pairs(src: np.ndarray, dst: np.ndarray) -> np.ndarray:
+    """All pairs of atoms that share a neighbor, given directed edges sorted by src.
+
+    >>> pairs = _neighbor_pairs(np.array([0, 1, 1, 2]), np.array([1, 0, 2, 1]))
+    >>> pairs[pairs[:, 0] < pairs[:, 1]].tolist()  # 0 and 2 share neighbor 1
+    [[0, 2]]
+    """
+    # each edge (n, a) is joined with every edge (n, b) from the same atom n
+    starts = np.searchsorted(src, src, side="left")
+    degree = np.searchsorted(src, src, side="right") - starts
+    left = np.repeat(dst, degree)
+    offsets = np.arange(len(left)) - np.repeat(np.cumsum(degree) - degree, degree)
+    right = dst[np.repeat(starts, degree) + offsets]
+    return np.stack([left, right], axis=1)
+
+
+def _buffer(skeleton, radius: float, resolution: int):
+    """Buffer each part of a skeleton separately and union the results.
+
+    Equivalent to ``skeleton.buffer(radius)``, but much faster on the many
+    crossing segments of large substructures.
+    """
+    import shapely
+
+    parts = shapely.get_parts(skeleton)
+    return shapely.union_all(shapely.buffer(parts, radius, quad_segs=resolution))
+
+
+def _poly_to_path(shape, origin=None):
+    """Path of the shape's boundary. If origin is provided, the shape is relative
+    to origin, and both are rounded separately, so that a shape always has the
+    same path (up to its starting point) wherever it is placed."""
     d = ""
     if hasattr(shape.boundary, "geoms"):
         bounds = shape.boundary.geoms
@@ -755,9 +1181,11 @@ def _poly_to_path(shape):
 
     for s in bounds:
         XY = s.coords
-        d += "M %0.1f,%0.1f " % XY[0]
+        if origin is not None:
+            XY = (np.round(np.asarray(XY), 1) + np.round(origin, 1)).tolist()
+        d += "M %0.1f,%0.1f " % tuple(XY[0])
         for xy in XY[1:]:
-            d += "L %0.1f,%0.1f " % xy
+            d += "L %0.1f,%0.1f " % tuple(xy)
         d += "Z "
     return d
 
@@ -766,51 +1194,112 @@ def load_ipython_extension():
     import xenopict.magic
 
 
-from collections import defaultdict
+# number of the latest optimizer passes kept in Xenopict.optimize_stats
+OPTIMIZE_STATS_KEPT = 16
 
 
-def _optimize_svg(svgdom):
-    for elem in svgdom.getElementsByTagName("path"):
-        if elem.hasAttribute("d"):
-            d = elem.getAttribute("d")
-            elem.setAttribute("d", _relative_path(d))
+class OptimizeStats(NamedTuple):
+    """What one call of the svg optimizer did, and how long it took."""
 
-    symb = defaultdict(list)
+    paths: int  # paths examined
+    compressed: int  # absolute paths converted to relative paths
+    replaced: int  # paths replaced by a <use> of a shared symbol
+    symbols: int  # symbols added to <defs>
+    bytes_saved: int  # reduction in the size of the serialized svg
+    seconds: float
 
-    N = 0
-    for elem in svgdom.getElementsByTagName("path"):
-        if not elem.hasAttribute("d"):
-            continue
-        d = elem.getAttribute("d")
-        if len(d) < 30:
-            continue
 
-        x, y, s = _d_symbol(d)  # type: ignore
+def _element_size(elem) -> int:
+    """Size of an empty element once serialized (ignoring escaping)."""
+    attrs = elem.attributes.items()
+    return len(elem.tagName) + 3 + sum([len(k) + len(v) + 4 for k, v in attrs])
 
-        symb[s].append((x, y, elem))
 
-    if symb := [i for i in symb.items() if len(i[1]) > 1]:
-        g = svgdom.createElementNS("http://www.w3.org/2000/svg", "defs")
-        svgdom.firstChild.appendChild(g)
+def _optimize_svg(svgdom, paths=None, shapes=None) -> OptimizeStats:
+    """Compress paths to relative coordinates and replace repeated shapes by
+    <use> references to a symbol in <defs>, in a single pass over the paths.
 
-        for n, (s, xyes) in enumerate(symb):
-            e = svgdom.createElementNS("http://www.w3.org/2000/svg", "path")
-            n = f"s{n}"
-            e.setAttribute("id", n)
-            e.setAttribute("d", s)
-            g.appendChild(e)
+    This can be called again after more layers are added: paths that are already
+    compressed are left alone, and new paths are also matched against the
+    symbols already in <defs>. To add layers without scanning the whole document
+    again, pass only the new `paths`, with the `shapes` index (shape -> x, y, path)
+    of the unique shapes found by the earlier passes. It is updated in place.
+    """
+    start = time.perf_counter()
+    root = svgdom.firstChild
+
+    defs = next((c for c in root.childNodes if c.nodeName == "defs"), None)
+    symbols = {}
+    if defs is not None:
+        symbols = {
+            e.getAttribute("d"): e.getAttribute("id")
+            for e in defs.childNodes
+            if e.nodeName == "path"
+        }
 
-            for x, y, elem in xyes:
-                e = svgdom.createElementNS("http://www.w3.org/2000/svg", "use")
-                e.setAttribute("href", f"#{n}")
-                e.setAttribute("x", x)
-                e.setAttribute("y", y)
+    if paths is None:
+        paths = svgdom.getElementsByTagName("path")
+    paths = [e for e in paths if e.parentNode is not defs and e.hasAttribute("d")]
+    ds = [e.getAttribute("d") for e in paths]
+
+    absolute = [i for i, d in enumerate(ds) if not d.startswith("m")]
+    saved = 0
+    for i, rel in zip(absolute, _relative_paths([ds[i] for i in absolute])):
+        saved += len(ds[i]) - len(rel)
+        paths[i].setAttribute("d", rel)
+        ds[i] = rel
+
+    # group paths by shape (hashing their path translated to the origin)
+    found = defaultdict(list)
+    for elem, d in zip(paths, ds):
+        if len(d) < 30:
+            continue
+        x, y, s = _d_symbol(d)
+        found[s].append((x, y, elem))
+
+    replaced = added = 0
+    for s, xyes in found.items():
+        if s not in symbols and shapes is not None:
+            lone = shapes.pop(s, None)
+            if lone is not None and lone[2].parentNode is not None:  # not removed since
+                xyes.insert(0, lone)
+            elif len(xyes) < 2:
+                shapes[s] = xyes[0]
+        if len(xyes) < 2 and s not in symbols:
+            continue
 
-                for c in ["style", "class", "fill", "id"]:
-                    if elem.hasAttribute(c):
-                        e.setAttribute(c, elem.getAttribute(c))
+        if defs is None:
+            defs = svgdom.createElementNS("http://www.w3.org/2000/svg", "defs")
+            root.appendChild(defs)
+            saved -= len("<defs></defs>")
 
-                elem.parentNode.replaceChild(e, elem)
+        n = symbols.get(s)
+        if n is None:
+            n = symbols[s] = f"s{len(symbols)}"
+            e = svgdom.createElementNS("http://www.w3.org/2000/svg", "path")
+            e.setAttribute("id", n)
+            e.setAttribute("d", s)
+            defs.appendChild(e)
+            saved -= _element_size(e)
+            added += 1
+
+        for x, y, elem in xyes:
+            e = svgdom.createElementNS("http://www.w3.org/2000/svg", "use")
+            e.setAttribute("href", f"#{n}")
+            e.setAttribute("x", x)
+            e.setAttribute("y", y)
+
+            for c in ["style", "class", "fill", "id"]:
+                if elem.hasAttribute(c):
+                    e.setAttribute(c, elem.getAttribute(c))
+
+            saved += _element_size(elem) - _element_size(e)
+            elem.parentNode.replaceChild(e, elem)
+            replaced += 1
+
+    return OptimizeStats(
+        len(paths), len(absolute), replaced, added, saved, time.perf_counter() - start
+    )
 
 
 def _d_symbol(d):
@@ -823,48 +1312,70 @@ def _d_symbol(d):
     return x, y, symb
 
 
+# number of coordinate pairs taken by each (absolute) command, and the format of its relative form
+_PATH_COMMANDS = {
+    "M": (1, "m%.1f %.1f"),
+    "L": (1, "l%.1f %.1f "),
+    "Q": (2, "q%.1f %.1f %.1f %.1f"),
+    "Z": (0, "z"),
+}
+_PATH_PAIRS = np.zeros(128, dtype=int)
+_PATH_PAIRS[[ord(c) for c in _PATH_COMMANDS]] = [n for n, _ in _PATH_COMMANDS.values()]
+_PATH_FORMATS = str.maketrans({c: f for c, (_, f) in _PATH_COMMANDS.items()})
+_NOT_PATH_COMMAND = re.compile(r"[^MLQZ\0]+")
+_PATH_SEPARATORS = str.maketrans("MLQZ,\0", "      ")
+
+
 def _relative_path(D):
     """Converts absolute path to relative path. This is an incomplete implementation
-    narrowly scoped to compress rdkit SVG depictions."""
-    xy: np.ndarray = np.array([0, 0])
-    D = iter(D.replace(",", " ").split())
-    out = ""
-    try:
-        while True:
-            d = next(D)
-            if d == "M":
-                out += "m"
-                xy1 = np.array([float(next(D)), float(next(D))])
-                delta = xy1 - xy  # type: ignore
-                xy = xy1
-                out += "%.1f %.1f" % tuple(delta)
-                continue
+    narrowly scoped to compress rdkit SVG depictions (M, L, Q and Z commands).
 
-            if d == "Q":
-                out += "q"
-                xy1 = np.array([float(next(D)), float(next(D).strip(","))])
-                delta = xy1 - xy
-                out += "%.1f %.1f " % tuple(delta)
+    >>> _relative_path("M 10.0,20.0 L 15.5,20.0 Q 16.0 21.0, 17.0 22.0 Z")
+    'm10 20l5.5 0 q0.5 1 1.5 2z'
+    """
+    return _relative_paths([D])[0]
 
-                xy1 = np.array([float(next(D)), float(next(D))])
-                delta = xy1 - xy
-                xy = xy1
-                out += "%.1f %.1f" % tuple(delta)
-                continue
 
-            if d == "L":
-                out += "l"
-                xy1 = np.array([float(next(D)), float(next(D))])
-                delta = xy1 - xy
-                xy = xy1
-                out += "%.1f %.1f " % tuple(delta)
-                continue
-            
-            if d == 'Z':
-                out += 'z'
-                continue
+def _relative_paths(Ds: Sequence[str]) -> list[str]:
+    """Vectorized :func:`_relative_path` over many paths at once.
+
+    All the paths are tokenized together (the commands with one regular
+    expression, the numbers with one split), their coordinates are converted
+    into one array, the offset of each coordinate from its command's starting
+    point (the endpoint of the previous command in the same path) is computed
+    in bulk, and everything is formatted by a single format string.
+    """
+    if not Ds:
+        return []
+
+    joined = "\0".join(Ds)
+    cmds = _NOT_PATH_COMMAND.sub("", joined)  # e.g. "MLML\0MQQZ"
+    xy = np.array(joined.translate(_PATH_SEPARATORS).split(), dtype=float).reshape(-1, 2)
+
+    codes = np.frombuffer(cmds.encode("ascii"), dtype=np.uint8)
+    counts = _PATH_PAIRS[codes]
+    npairs = counts.sum()
+
+    if 2 * npairs != xy.size:
+        raise ValueError("Unsupported path data: only M, L, Q and Z commands are handled.")
+
+    # Mark the last pair of each command: its endpoint, which the next command is relative to.
+    is_end = np.zeros(npairs, dtype=bool)
+    is_end[np.cumsum(counts)[counts > 0] - 1] = True
+
+    # Number of endpoints before each pair, and before the start of its path.
+    path = np.repeat(np.cumsum(codes == 0), counts)
+    per_path = np.bincount(path, minlength=len(Ds))
+    starts = np.cumsum(per_path) - per_path
+    before = np.cumsum(is_end) - is_end
+    first = np.concatenate([before, [0]])[starts][path]
+
+    # Pairs with no endpoint before them in their path are relative to the origin.
+    ends = np.vstack([np.zeros((1, 2)), xy[is_end]])
+    ref = np.where(before > first, before, 0)
+    delta = xy - ends[ref]
 
-            raise ValueError(d)
+    fmt = cmds.translate(_PATH_FORMATS)
+    out = (fmt % tuple(delta.ravel().tolist())).replace(".0", "").split("\0")
+    return [f"m{o[1:]}".strip() for o in out]
 
-    except StopIteration:
-        return f"m{out[1:]}".replace(".0", "").strip()
@@ -0,0 +1,184 @@
+"""
+Lay out many depictions in a single SVG document.
+
+Each molecule is placed in its own nested ``<svg>`` cell. The shapes of all
+molecules (glyphs, bonds, shading) are deduplicated into one shared
+``<defs>``, so a sheet of hundreds of molecules stores each repeated shape
+once, and all ids are made unique (per molecule, then per document, like
+:meth:`.Xenopict.to_svg`) so they never collide, even with other documents.
+
+>>> from xenopict import Xenopict
+>>> grid = Grid([Xenopict("c1ccccc1Cl"), Xenopict("Clc1ccncc1"), Xenopict("CCO")], columns=2)
+>>> svg = grid.to_svg()
+>>> svg.count("<defs>"), svg.count("<svg ")
+(1, 4)
+"""
+from __future__ import annotations
+
+import hashlib
+import math
+from typing import TYPE_CHECKING, Optional, Sequence
+
+from .dom import parse as parse_svg
+from .drawer import (
+    _add_svg_attributes,
+    _optimize_svg,
+    _uniquify_refs,
+)
+
+if TYPE_CHECKING:
+    from .drawer import Xenopict
+
+__all__ = ["Grid"]
+
+_SVG_NS = "http://www.w3.org/2000/svg"
+
+
+class Grid:
+    """
+    A grid of depictions.
+
+    Args:
+        pictures (Sequence[Xenopict]):
+            The depictions, laid out row by row. They are not modified.
+        columns (int | None, optional):
+            Number of columns. Defaults to the ceiling of the square root of the
+            number of pictures.
+        padding (float, optional):
+            Space between cells, and around the grid. Defaults to 10.
+        dom_backend (str, optional):
+            DOM backend (see :mod:`xenopict.dom`) used to assemble the document.
+            Defaults to "etree".
+    """
+
+    def __init__(
+        self,
+        pictures: Sequence["Xenopict"],
+        columns: Optional[int] = None,
+        padding: float = 10,
+        dom_backend: str = "etree",
+    ):
+        self.pictures = list(pictures)
+        self.columns = columns or max(1, math.ceil(math.sqrt(len(self.pictures))))
+        self.padding = padding
+        self.dom_backend = dom_backend
+
+    def _layout(self):
+        """The x, y, width and height of each picture (centered in equally sized
+        cells), and the width and height of the grid."""
+        sizes = [
+            (float(root.getAttribute("width")), float(root.getAttribute("height")))
+            for root in (p.svgdom.firstChild for p in self.pictures)
+        ]
+        cw = max((w for w, _ in sizes), default=0)
+        ch = max((h for _, h in sizes), default=0)
+        pad = self.padding
+
+        cells = []
+        for i, (w, h) in enumerate(sizes):
+            row, col = divmod(i, self.columns)
+            x = pad + col * (cw + pad) + (cw - w) / 2
+            y = pad + row * (ch + pad) + (ch - h) / 2
+            cells.append((x, y, w, h))
+
+        rows = math.ceil(len(sizes) / self.columns)
+        columns = min(len(sizes), self.columns)
+        return cells, (pad + columns * (cw + pad), pad + rows * (ch + pad))
+
+    def to_dom(self):
+        """The grid as a (not uniquified) svg document."""
+        dom = parse_svg(
+            f'<svg xmlns="{_SVG_NS}" version="1.1" baseProfile="full"></svg>',
+            self.dom_backend,
+        )
+        root = dom.firstChild
+        defs = dom.createElementNS(_SVG_NS, "defs")
+        symbols: dict[str, str] = {}  # path -> id of the shared symbol
+
+        cells, (width, height) = self._layout()
+        for i, (picture, (x, y, w, h)) in enumerate(zip(self.pictures, cells)):
+            src = parse_svg(picture.svgdom.toxml(), self.dom_backend).firstChild
+
+            cell = dom.createElementNS(_SVG_NS, "svg")
+            for name, value in [("x", x), ("y", y), ("width", w), ("height", h)]:
+                cell.setAttribute(name, "%0.1f" % value)
+            cell.setAttribute("viewBox", src.getAttribute("viewBox"))
+
+            # move the molecule's symbols into the shared defs
+            renamed = {}
+            for child in list(src.childNodes):
+                if child.nodeName != "defs":
+                    continue
+                src.removeChild(child)
+                for e in child.childNodes:
+                    if e.nodeName != "path":
+                        continue
+                    d = e.getAttribute("d")
+                    if d not in symbols:
+                        symbols[d] = f"s{len(symbols)}"
+                        shared = e.cloneNode(True)
+                        shared.setAttribute("id", symbols[d])
+                        defs.appendChild(shared)
+                    renamed[f"#{e.getAttribute('id')}"] = f"#{symbols[d]}"
+
+            for child in list(src.childNodes):
+                src.removeChild(child)
+                cell.appendChild(child)
+            _rename_refs(cell, renamed, f"_m{i}")
+            root.appendChild(cell)
+
+        if symbols:
+            root.appendChild(defs)
+
+        # match the shapes of all molecules against each other
+        _optimize_svg(dom)
+
+        root.setAttribute("width", "%0.1f" % width)
+        root.setAttribute("height", "%0.1f" % height)
+        root.setAttribute("viewBox", "0 0 %0.1f %0.1f" % (width, height))
+        return dom
+
+    def to_svg(
+        self,
+        uniquify_internal_refs: bool = True,
+        hash_length: int = 10,
+        svg_attributes: dict = {},
+    ) -> str:
+        """The grid as an svg, with ids uniquified as in :meth:`.Xenopict.to_svg`."""
+        svg = self.to_dom().toxml()
+
+        if uniquify_internal_refs:
+            md5 = hashlib.md5(svg.encode("utf-8")).hexdigest()[:hash_length]
+            svg = _uniquify_refs(svg, md5)
+
+        if svg_attributes:
+            svg = _add_svg_attributes(svg, svg_attributes)
+        return svg
+
+    def to_html(self) -> str:
+        """The grid embedded in a white-background div, like :meth:`.Xenopict.to_html`."""
+        svg = self.to_svg(
+            svg_attributes={"style": "display:block;max-width:100%;margin:auto"}
+        )
+        return f"<div style='background:white;width:100%'>{svg}</div>"
+
+    def _repr_svg_(self):
+        return self.to_svg()
+
+    def _repr_html_(self):
+        return self.to_html()
+
+
+def _rename_refs(elem, renamed: dict[str, str], suffix: str):
+    """Point hrefs at shared symbols, and add suffix to all other ids and internal hrefs."""
+    stack = [elem]
+    while stack:
+        e = stack.pop()
+        if e.nodeType != e.ELEMENT_NODE:
+            continue
+        if e.hasAttribute("id"):
+            e.setAttribute("id", e.getAttribute("id") + suffix)
+        href = e.getAttribute("href")
+        if href.startswith("#"):  # other documents (e.g. glyph sprites) are left alone
+            e.setAttribute("href", renamed.get(href, href + suffix))
+        stack.extend(e.childNodes)
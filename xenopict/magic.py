@@ -1,6 +1,9 @@
 from rdkit.Chem import rdchem
 from xenopict import Xenopict
 from xenopict.monkey import BoostModulePatcher
+from xenopict.cache import LRUCache, mol_identity
+from xenopict.pager import Pager
+import xenopict.dom
 
 import xml.dom.minidom
 
@@ -32,6 +35,7 @@ def register_minidom():
             "image/svg+xml"
         ]  # ignore
         formatter.for_type(xml.dom.minidom.Document, _minidom_repr_svg)
+        formatter.for_type(xenopict.dom.Document, _minidom_repr_svg)
 
 
 def _minidom_repr_svg(doc):
@@ -45,14 +49,35 @@ def _minidom_repr_svg(doc):
 #
 
 
+# renderings of recently shown molecules, as they are shown again and again
+# (on reruns, redisplayed tables, and every str(mol))
+_renderings: LRUCache[str] = LRUCache(maxsize=1024)
+
+
+def _rendering_key(mol, format: str) -> tuple:
+    # drawing options can be changed on the class, so they are part of the key
+    options = tuple(repr(getattr(Xenopict, o)) for o in Xenopict.depiction_options)
+    return format, mol_identity(mol), options
+
+
+def _render_mol(mol, format: str) -> str:
+    key = _rendering_key(mol, format)
+    out = _renderings.get(key)
+    if out is None:
+        x = Xenopict(mol)
+        out = x.to_html() if format == "html" else x._repr_svg_()
+        _renderings.put(key, out)
+    return out
+
+
 def _rdkit_repr_html(mol):
     """Formatter that uses Xenopict for rdchem.Mols"""
-    return Xenopict(mol).to_html() if isinstance(mol, rdchem.Mol) else mol
+    return _render_mol(mol, "html") if isinstance(mol, rdchem.Mol) else mol
 
 
 def _rdkit_repr_svg(mol):
     """Formatter that uses Xenopict for rdchem.Mols"""
-    return Xenopict(mol)._repr_svg_() if isinstance(mol, rdchem.Mol) else mol
+    return _render_mol(mol, "svg") if isinstance(mol, rdchem.Mol) else mol
 
 
 def register_rdkit():
@@ -83,18 +108,66 @@ def patch_rdkit():
 #
 
 
+PAGE_SIZE = 50
+
+# the pager of each recently shown list, so showing it again reuses drawn pages
+# (the pager holds on to its list, so its id is not reused while it is cached)
+_pagers: LRUCache[Pager] = LRUCache(maxsize=4)
+
+
+def pager(input) -> Pager:
+    """
+    The pager that shows a long list of depictions in the notebook. Change its
+    page, and show the list (or the pager) again to see the other depictions:
+
+    >>> mols = [Xenopict("C" * (n % 5 + 1)) for n in range(120)]
+    >>> pager(mols).goto(2) is pager(mols)
+    True
+    >>> "Molecules 101-120 of 120" in _list_mol_html(mols)
+    True
+    """
+    shown = _pagers.get(id(input))
+    if shown is None or shown.items is not input:
+        shown = Pager(input, PAGE_SIZE, cache_size=4)
+        _pagers.put(id(input), shown)
+    return shown
+
+
 def _list_mol_html(input):
-    if not input or len(input) > 50:
+    if not input:
         return repr(input)
 
     if not isinstance(input[0], Xenopict):
         raise NotImplementedError
 
-    divs = [
-        f"<div style='border:solid 1px black;'>{item.to_html()}</div>" for item in input
-    ]
+    if len(input) <= PAGE_SIZE:
+        # drawn afresh, like any other display of the depictions
+        return Pager(input, PAGE_SIZE, cache_size=0)._repr_html_()
+
+    # only the shown page is drawn
+    p = pager(input)
+    html = p._repr_html_()
+    if p.pages > 1:
+        html += (
+            "<div style='font-family:sans-serif;font-size:small'>"
+            "Show other pages with <code>xenopict.magic.pager(list).next()</code>,"
+            " or install ipywidgets for buttons.</div>"
+        )
+    return html
+
+
+def _list_mol_display(input):
+    """Show long lists of depictions with the buttons of :meth:`.Pager.widget`."""
+    if not input or not isinstance(input[0], Xenopict):
+        raise NotImplementedError
+
+    p = pager(input)
+    if p.pages == 1:
+        raise NotImplementedError  # shown by the html formatter
+
+    from IPython.display import display
 
-    return f'<div style="display:flex;flex-wrap:wrap;align-items:flex-start">{"".join(divs)}</div>'
+    display(p.widget())
 
 
 def register_list_mol():
@@ -110,6 +183,15 @@ def register_list_mol():
         formatter.for_type(tuple, _list_mol_html)
         formatter.for_type(list, _list_mol_html)
 
+        try:
+            import ipywidgets  # noqa: F401
+        except ImportError:
+            return
+
+        display = ip.display_formatter.ipython_display_formatter  # type: ignore
+        display.for_type(tuple, _list_mol_display)
+        display.for_type(list, _list_mol_display)
+
 
 #
 # Patch Pandas
@@ -0,0 +1,157 @@
+"""
+Paged display of long lists of depictions.
+
+A :class:`Pager` shows one page of a list of :class:`.Xenopict` objects at a
+time, and only draws the page that is shown. Pages are drawn when first shown
+and then kept, so paging back and forth (or displaying the list again) is
+free. In a notebook, step through the pages with :meth:`Pager.next`, or use
+the buttons of :meth:`Pager.widget` (which needs ``ipywidgets``). Long lists
+shown in a notebook with :mod:`xenopict.magic` are paged like this, with their
+buttons if ``ipywidgets`` is installed, or else by :func:`xenopict.magic.pager`:
+
+>>> from xenopict import Xenopict
+>>> pager = Pager([Xenopict("C" * n) for n in range(1, 8)], page_size=3)
+>>> pager.pages
+3
+>>> html = pager._repr_html_()  # draws the first page only
+>>> pager.next().page, pager.cached_pages
+(1, 1)
+>>> "Molecules 4-6 of 7" in pager._repr_html_()
+True
+
+A page is drawn again when its depictions are changed with their methods (like
+:meth:`.Xenopict.shade`); call :meth:`Pager.clear` to redraw the pages after
+editing the svg of a depiction directly.
+"""
+from __future__ import annotations
+
+import math
+from typing import TYPE_CHECKING, Sequence
+
+from .cache import LRUCache
+from .timing import timed
+
+if TYPE_CHECKING:
+    from .drawer import Xenopict
+
+__all__ = ["Pager"]
+
+
+class Pager:
+    """
+    A paged view of a list of depictions.
+
+    Args:
+        items (Sequence[Xenopict]):
+            The depictions. The sequence is not copied.
+        page_size (int, optional):
+            Number of depictions on each page. Defaults to 50.
+        page (int, optional):
+            The page shown first. Defaults to 0.
+        cache_size (int, optional):
+            Number of drawn pages that are kept. Defaults to 32.
+    """
+
+    def __init__(
+        self,
+        items: Sequence["Xenopict"],
+        page_size: int = 50,
+        page: int = 0,
+        cache_size: int = 32,
+    ):
+        self.items = items
+        self.page_size = max(1, page_size)
+        self._pages: LRUCache[str] = LRUCache(maxsize=cache_size)  # (page, length) -> html
+        self.page = 0
+        self.goto(page)
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    @property
+    def pages(self) -> int:
+        return max(1, math.ceil(len(self.items) / self.page_size))
+
+    @property
+    def cached_pages(self) -> int:
+        return len(self._pages)
+
+    def goto(self, page: int) -> "Pager":
+        """Show `page` (clipped to the existing pages)."""
+        self.page = min(max(page, 0), self.pages - 1)
+        return self
+
+    def next(self) -> "Pager":
+        return self.goto(self.page + 1)
+
+    def previous(self) -> "Pager":
+        return self.goto(self.page - 1)
+
+    def clear(self):
+        """Forget the drawn pages, so they are drawn again when shown."""
+        self._pages.clear()
+
+    def _bounds(self, page: int) -> tuple[int, int]:
+        start = page * self.page_size
+        return start, min(start + self.page_size, len(self.items))
+
+    def page_html(self, page: int) -> str:
+        """The depictions on `page`, as html."""
+        # the last page changes if the list grows, and a page if its depictions change
+        start, stop = self._bounds(page)
+        items = self.items[start:stop]
+        key = (page, len(self.items), tuple(_revision(item) for item in items))
+        html = self._pages.get(key)
+        if html is None:
+            html = self._draw_page(items)
+            self._pages.put(key, html)
+        return html
+
+    @timed("pager_page")
+    def _draw_page(self, items: Sequence["Xenopict"]) -> str:
+        divs = [f"<div style='border:solid 1px black;'>{item.to_html()}</div>" for item in items]
+        return f'<div style="display:flex;flex-wrap:wrap;align-items:flex-start">{"".join(divs)}</div>'
+
+    def caption(self) -> str:
+        start, stop = self._bounds(self.page)
+        return (
+            f"Molecules {start + 1}-{stop} of {len(self.items)}"
+            f" (page {self.page + 1} of {self.pages})"
+        )
+
+    def _repr_html_(self) -> str:
+        html = self.page_html(self.page)
+        if self.pages == 1:
+            return html
+        caption = f"<div style='font-family:sans-serif;font-size:small'>{self.caption()}</div>"
+        return caption + html
+
+    def widget(self):
+        """An ``ipywidgets`` view of the pager, with buttons to change pages."""
+        try:
+            import ipywidgets as widgets
+        except ImportError as e:
+            raise ImportError("Pager.widget requires ipywidgets.") from e
+
+        back = widgets.Button(description="Previous", icon="arrow-left")
+        forward = widgets.Button(description="Next", icon="arrow-right")
+        label = widgets.Label()
+        view = widgets.HTML()
+
+        def show(page: int):
+            self.goto(page)
+            label.value = self.caption()
+            view.value = self.page_html(self.page)
+            back.disabled = self.page == 0
+            forward.disabled = self.page == self.pages - 1
+
+        back.on_click(lambda _: show(self.page - 1))
+        forward.on_click(lambda _: show(self.page + 1))
+        show(self.page)
+
+        return widgets.VBox([widgets.HBox([back, label, forward]), view])
+
+
+def _revision(item) -> tuple["Xenopict", int]:
+    """A depiction, and how often it has been changed."""
+    return item, vars(item).get("_revision", 0)
@@ -1,9 +1,21 @@
 from __future__ import annotations
 
+from typing import NamedTuple, Optional
+
 import numpy as np
 from six.moves.collections_abc import Sequence
 
 
+class DotTable(NamedTuple):
+    """Dots as parallel arrays, one entry per dot."""
+
+    radius: np.ndarray
+    color: np.ndarray
+    x: Optional[np.ndarray]
+    y: Optional[np.ndarray]
+    index: np.ndarray  # position of the value in zs that each dot depicts
+
+
 class PlotDot:
     def __init__(self, levels=4):
         self.levels = levels
@@ -29,6 +41,65 @@ class PlotDot:
     def all_dots(self, zs: Sequence[float]) -> list[list[tuple[float, float]]]:
         return [self.single_dot(z) for z in zs]
 
+    def dots_array(self, zs: Sequence[float], coords=None, sort=True) -> DotTable:
+        """
+        Vectorized version of :meth:`__call__`, returning a :class:`DotTable`.
+
+        >>> dots = PlotDot().dots_array([0.2, -1.0], [[0, 0], [10, 0]])
+        >>> dots.radius.round(2).tolist(), dots.color.tolist(), dots.x.tolist()
+        ([0.5, 1.0, 0.87, 0.71, 0.5], [0.2, -0.25, -0.5, -0.75, -1.0], [0.0, 10.0, 10.0, 10.0, 10.0])
+
+        Args:
+            zs: z values (in range [-1, 1]).
+            coords: Optional coordinates of each value, an array of shape (len(zs), 2).
+            sort: Sort the dots in drawing order (default: True).
+        """
+        zs = np.asarray(zs, dtype=float).reshape(-1)
+        levels = np.arange(self.levels)
+
+        # radius and color of each (value, level), as in dot_radius and dot_color
+        R = np.abs(zs)[:, None] - (1 - self.stops[levels])
+        with np.errstate(invalid="ignore"):
+            radius = np.where(R < self.stops[0], 0.0, R) ** 0.5
+        radius[:, 0] = self.stops[0] ** 0.5
+
+        sign = np.where(zs < 0, -1.0, 1.0)[:, None]
+        color = sign * self.stops[::-1][levels]
+        color[:, 0] = zs
+
+        index = np.repeat(np.arange(len(zs)), self.levels).reshape(radius.shape)
+
+        keep = radius != 0
+        radius, color, index = radius[keep], color[keep], index[keep]
+
+        x = y = None
+        if coords is not None:
+            xy = np.asarray(coords, dtype=float)[index]
+            x, y = xy[:, 0], xy[:, 1]
+
+        dots = DotTable(radius, color, x, y, index)
+        return self.sort_dots_array(dots) if sort else dots
+
+    @staticmethod
+    def sort_dots_array(*tables: DotTable) -> DotTable:
+        """
+        Concatenate dot tables and (stably) sort them in drawing order, like :meth:`_sort_dots`.
+        """
+        if not tables:
+            empty = np.zeros(0)
+            return DotTable(empty, empty, empty, empty, empty.astype(int))
+
+        fields = []
+        for values in zip(*tables):
+            if any(v is None for v in values):
+                fields.append(None)
+            else:
+                fields.append(np.concatenate(values))
+        dots = DotTable(*fields)
+
+        order = np.lexsort((dots.radius, np.abs(dots.color)))
+        return DotTable(*(None if f is None else f[order] for f in dots))
+
     def __call__(self, zs: Sequence[float], coords):
         """
         Input:
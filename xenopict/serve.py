@@ -0,0 +1,411 @@
+"""
+A local HTTP server of depictions, built on the standard library.
+
+    python -m xenopict.serve --port 8000 --workers 4
+
+serves ``GET /svg`` and ``GET /html`` with the query parameters
+
+- ``smiles``: the molecule (required),
+- ``shading``: comma separated atom shading (optional),
+- ``bond_shading``: comma separated bond shading (optional),
+- and any of the drawing options in :data:`OPTIONS` (like ``scale=30``).
+
+Depictions are drawn by a pool of worker processes. Responses are cached
+(in an LRU), carry an ETag derived from the content hash that
+:meth:`.Xenopict.to_svg` puts in ids (so clients can revalidate with
+``If-None-Match``), and concurrent identical requests are coalesced, so each
+is drawn once. ``GET /health`` answers "ok".
+
+The server can also be embedded, with a thread pool instead of processes:
+
+>>> service = RenderService(workers=1, use_processes=False)
+>>> etag, svg = service.render("CCO", [1, 0, -1])
+>>> etag
+'"svg-..."'
+>>> service.render("CCO", [1, 0, -1]) == (etag, svg)  # cached
+True
+>>> service.close()
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import threading
+from concurrent.futures import (
+    Executor,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+)
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Optional, Sequence
+from urllib.parse import parse_qs, urlsplit
+
+from .cache import LRUCache
+
+__all__ = ["RenderService", "DepictionServer", "make_server", "main", "OPTIONS"]
+
+# drawing options that can be set in queries, with their types
+OPTIONS: dict[str, type] = {
+    "scale": float,
+    "down_scale": float,
+    "mark_down_scale": float,
+    "shapely_resolution": int,
+    "diverging_cmap": bool,
+    "add_atom_indices": bool,
+    "add_bond_indices": bool,
+    "dummies_are_attachments": bool,
+    "native_text": bool,
+    "cmap": str,
+}
+
+CONTENT_TYPES = {
+    "svg": "image/svg+xml; charset=utf-8",
+    "html": "text/html; charset=utf-8",
+}
+
+# the content hash that to_svg appends to all ids
+_CONTENT_HASH = re.compile(r'_xeno_([0-9a-f]+)"')
+
+
+class RenderError(ValueError):
+    """A request that cannot be drawn (bad smiles, shading, or options)."""
+
+
+def _render_response(
+    xenopict_class, smiles, atom_shading, bond_shading, options, format
+) -> tuple[str, str]:
+    """Draw a depiction (in a worker), and return its ETag and body."""
+    from rdkit.Chem import MolFromSmiles
+
+    from .batch import _render_one
+
+    mol = MolFromSmiles(smiles)
+    if mol is None:
+        raise RenderError(f"Invalid smiles: {smiles!r}")
+
+    n_atoms, n_bonds = mol.GetNumAtoms(), mol.GetNumBonds()
+    if atom_shading is not None and len(atom_shading) != n_atoms:
+        raise RenderError(f"Expected {n_atoms} atom shading values.")
+    if bond_shading is not None and len(bond_shading) != n_bonds:
+        raise RenderError(f"Expected {n_bonds} bond shading values.")
+    if bond_shading is not None:
+        # one value per bond, in the molecule's bond order
+        bonds = mol.GetBonds()
+        bond_shading = (
+            [b.GetBeginAtomIdx() for b in bonds],
+            [b.GetEndAtomIdx() for b in bonds],
+            bond_shading,
+        )
+
+    body = _render_one(xenopict_class, mol, atom_shading, bond_shading, options, format)
+    match = _CONTENT_HASH.search(body)
+    digest = match[1] if match else hashlib.md5(body.encode("utf-8")).hexdigest()
+    return f'"{format}-{digest}"', body
+
+
+class RenderService:
+    """
+    Draws depictions in a worker pool, with a response cache and request coalescing.
+
+    Args:
+        workers (int | None, optional):
+            Number of workers. Defaults to the number of cpus.
+        cache_size (int, optional):
+            Number of responses kept in memory. Defaults to 4096.
+        max_pending (int | None, optional):
+            Maximum number of drawings in flight, beyond which :meth:`render`
+            raises :class:`OverflowError`. Defaults to None (unbounded).
+        use_processes (bool, optional):
+            Whether workers are processes (the default) or threads.
+        executor (Executor | None, optional):
+            Use this executor instead of managing one.
+        xenopict_class (type | None, optional):
+            Class used to draw each molecule. Defaults to :class:`.Xenopict`.
+    """
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        cache_size: int = 4096,
+        max_pending: Optional[int] = None,
+        use_processes: bool = True,
+        executor: Optional[Executor] = None,
+        xenopict_class: Optional[type] = None,
+    ):
+        if xenopict_class is None:
+            from .drawer import Xenopict
+
+            xenopict_class = Xenopict
+
+        self.xenopict_class = xenopict_class
+        self.max_pending = max_pending
+        self.cache: LRUCache[tuple[str, str]] = LRUCache(maxsize=cache_size)
+
+        self._own_executor = executor is None
+        if executor is None:
+            workers = workers or os.cpu_count() or 1
+            pool = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+            executor = pool(workers)
+        self.executor = executor
+
+        # reentrant, as a drawing done before its callback is added calls back at once
+        self._lock = threading.RLock()
+        self._inflight: dict[str, Future] = {}
+        self.drawn = 0  # number of drawings submitted to workers
+
+    @staticmethod
+    def key(smiles, atom_shading, bond_shading, options: dict, format: str) -> str:
+        return json.dumps(
+            [format, smiles, atom_shading, bond_shading, sorted(options.items())]
+        )
+
+    def render(
+        self,
+        smiles: str,
+        atom_shading: Optional[Sequence[float]] = None,
+        bond_shading: Optional[Sequence[float]] = None,
+        format: str = "svg",
+        timeout: Optional[float] = None,
+        **options: Any,
+    ) -> tuple[str, str]:
+        """
+        The ETag and body of a depiction, from the cache, from an identical
+        drawing already in flight, or else drawn by a worker.
+
+        Raises:
+            RenderError: If the request cannot be drawn.
+            OverflowError: If `max_pending` drawings are already in flight.
+        """
+        if format not in CONTENT_TYPES:
+            raise RenderError(f"Unknown format: {format}")
+
+        atom_shading = None if atom_shading is None else list(atom_shading)
+        bond_shading = None if bond_shading is None else list(bond_shading)
+        key = self.key(smiles, atom_shading, bond_shading, options, format)
+
+        response = self.cache.get(key)
+        if response is not None:
+            return response
+
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is None:
+                # it may have been drawn since the cache was checked
+                response = self.cache.get(key)
+                if response is not None:
+                    return response
+                if self.max_pending is not None and len(self._inflight) >= self.max_pending:
+                    raise OverflowError("Too many depictions in flight.")
+                future = self.executor.submit(
+                    _render_response,
+                    self.xenopict_class,
+                    smiles,
+                    atom_shading,
+                    bond_shading,
+                    options,
+                    format,
+                )
+                self.drawn += 1
+                self._inflight[key] = future
+                future.add_done_callback(lambda f: self._done(key, f))
+
+        return future.result(timeout)
+
+    def _done(self, key: str, future: Future):
+        if not future.cancelled() and future.exception() is None:
+            self.cache.put(key, future.result())
+        with self._lock:
+            self._inflight.pop(key, None)
+
+    def close(self):
+        if self._own_executor:
+            self.executor.shutdown(wait=True, cancel_futures=True)
+
+
+def _floats(value: str) -> list[float]:
+    try:
+        return [float(v) for v in value.split(",")] if value else []
+    except ValueError:
+        raise RenderError(f"Shading must be comma separated numbers: {value!r}")
+
+
+def _cmap(value: str) -> str:
+    from .colormap import colormaps
+
+    if value in colormaps:
+        return value
+    try:
+        from matplotlib import colormaps as registry  # type: ignore
+    except ImportError:
+        registry = {}
+    if value not in registry:
+        raise RenderError(f"Unknown colormap: {value!r}")
+    return value
+
+
+def _option(name: str, value: str) -> Any:
+    kind = OPTIONS.get(name)
+    if kind is None:
+        raise RenderError(f"Unknown parameter: {name}")
+    if name == "cmap":
+        return _cmap(value)
+    if kind is bool:
+        if value.lower() not in ("1", "0", "true", "false"):
+            raise RenderError(f"Expected a boolean for {name}: {value!r}")
+        return value.lower() in ("1", "true")
+    try:
+        return kind(value)
+    except ValueError:
+        raise RenderError(f"Expected {kind.__name__} for {name}: {value!r}")
+
+
+def parse_query(query: str) -> dict:
+    """
+    The arguments of :meth:`RenderService.render` from a query string.
+
+    >>> parse_query("smiles=CCO&shading=1,0,-1&scale=30")
+    {'smiles': 'CCO', 'atom_shading': [1.0, 0.0, -1.0], 'scale': 30.0}
+    """
+    args: dict[str, Any] = {}
+    for name, values in parse_qs(query, keep_blank_values=True).items():
+        value = values[-1]
+        if name == "smiles":
+            args["smiles"] = value
+        elif name == "shading":
+            args["atom_shading"] = _floats(value)
+        elif name == "bond_shading":
+            args["bond_shading"] = _floats(value)
+        else:
+            args[name] = _option(name, value)
+
+    if not args.get("smiles"):
+        raise RenderError("Missing parameter: smiles")
+    return args
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """
+    Whether an If-None-Match header (a list of ETags, or "*") matches `etag`.
+
+    >>> _etag_matches('"svg-1", W/"svg-2"', '"svg-2"')
+    True
+    >>> _etag_matches('"svg-12"', '"svg-1"')
+    False
+    """
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return any(tag == "*" or tag.removeprefix("W/") == etag for tag in tags)
+
+
+class DepictionHandler(BaseHTTPRequestHandler):
+    server: "DepictionServer"
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        format = url.path.strip("/")
+
+        if format == "health":
+            return self._send(HTTPStatus.OK, b"ok", "text/plain; charset=utf-8")
+        if format not in CONTENT_TYPES:
+            return self._error(HTTPStatus.NOT_FOUND, "Use /svg or /html.")
+
+        try:
+            args = parse_query(url.query)
+            etag, body = self.server.service.render(format=format, **args)
+        except RenderError as e:
+            return self._error(HTTPStatus.BAD_REQUEST, str(e))
+        except OverflowError as e:
+            return self._error(HTTPStatus.SERVICE_UNAVAILABLE, str(e))
+        except Exception as e:
+            self.log_error("Failed to draw %s: %r", url.query, e)
+            return self._error(HTTPStatus.INTERNAL_SERVER_ERROR, "Failed to draw.")
+
+        headers = {"ETag": etag, "Cache-Control": self.server.cache_control}
+        if _etag_matches(self.headers.get("If-None-Match", ""), etag):
+            return self._send(HTTPStatus.NOT_MODIFIED, b"", None, headers)
+        self._send(HTTPStatus.OK, body.encode("utf-8"), CONTENT_TYPES[format], headers)
+
+    def _error(self, status: HTTPStatus, message: str):
+        self._send(status, message.encode("utf-8"), "text/plain; charset=utf-8")
+
+    def _send(self, status, body: bytes, content_type: Optional[str], headers: dict = {}):
+        self.send_response(status)
+        if content_type:
+            self.send_header("Content-Type", content_type)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    do_HEAD = do_GET
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+
+class DepictionServer(ThreadingHTTPServer):
+    """A threading HTTP server answering requests with a :class:`RenderService`."""
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address: tuple[str, int],
+        service: RenderService,
+        cache_control: str = "public, max-age=86400",
+        quiet: bool = False,
+    ):
+        super().__init__(address, DepictionHandler)
+        self.service = service
+        self.cache_control = cache_control
+        self.quiet = quiet
+
+
+def make_server(
+    host: str = "127.0.0.1", port: int = 8000, quiet: bool = False, **service_args: Any
+) -> DepictionServer:
+    """A server on `host` and `port`, with a new :class:`RenderService`."""
+    return DepictionServer((host, port), RenderService(**service_args), quiet=quiet)
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    parser = argparse.ArgumentParser(
+        prog="python -m xenopict.serve", description="Serve xenopict depictions over HTTP."
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=None, help="default: number of cpus")
+    parser.add_argument("--cache-size", type=int, default=4096)
+    parser.add_argument("--max-pending", type=int, default=None)
+    parser.add_argument("--quiet", action="store_true", help="do not log requests")
+    args = parser.parse_args(argv)
+
+    server = make_server(
+        args.host,
+        args.port,
+        quiet=args.quiet,
+        workers=args.workers,
+        cache_size=args.cache_size,
+        max_pending=args.max_pending,
+    )
+    host, port = server.server_address[:2]
+    print(f"Serving depictions on http://{host}:{port}/svg?smiles=...", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.service.close()
+
+
+if __name__ == "__main__":
+    main()
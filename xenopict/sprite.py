@@ -0,0 +1,96 @@
+"""
+A sprite sheet of text glyphs, shared by many depictions.
+
+The glyphs RDKit draws for atom labels come from a small alphabet, but each
+svg carries its own copy of them. With the ``glyph_sprite`` option,
+:class:`.Xenopict` instead references glyphs in an external sprite file with
+``<use href="glyphs.svg#g...">``, and registers them in the sprite. Write the
+sprite out once, next to the pages that embed the depictions:
+
+>>> from xenopict import Xenopict
+>>> sprite = GlyphSprite("glyphs.svg")
+>>> svg = Xenopict("OCCN", glyph_sprite=sprite).to_svg()
+>>> 'href="glyphs.svg#g' in svg
+True
+>>> len(sprite) > 0
+True
+>>> sprite.to_svg()
+'<?xml version="1.0" ?><svg xmlns="http://www.w3.org/2000/svg"><defs><path id="g..." d="M0,0..."/>...</defs></svg>'
+
+Glyph ids are hashes of their shapes, so they never change: an updated sprite
+file only adds glyphs, and stays valid for every depiction made before.
+The sprite's :attr:`~GlyphSprite.version` changes whenever glyphs are added,
+which can be used to name (and cache forever) each published sprite file.
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import tempfile
+from typing import Mapping, Optional
+
+__all__ = ["GlyphSprite"]
+
+
+class GlyphSprite:
+    """
+    A set of glyph shapes, keyed by content-hashed ids.
+
+    Args:
+        href (str, optional):
+            Url of the sprite file, as referenced from the depictions.
+            Defaults to "glyphs.svg".
+    """
+
+    def __init__(self, href: str = "glyphs.svg"):
+        self.href = href
+        self.glyphs: dict[str, str] = {}  # id -> path (starting at the origin)
+
+    def __repr__(self) -> str:
+        # the repr is part of the depiction cache key, so it must not depend on glyphs
+        return f"GlyphSprite({self.href!r})"
+
+    def __len__(self) -> int:
+        return len(self.glyphs)
+
+    def __contains__(self, glyph_id: str) -> bool:
+        return glyph_id in self.glyphs
+
+    @staticmethod
+    def glyph_id(d: str) -> str:
+        return "g" + hashlib.sha1(d.encode("utf-8")).hexdigest()[:10]
+
+    def add(self, d: str) -> str:
+        """Add the glyph with path `d` (starting at the origin), and return its id."""
+        glyph_id = self.glyph_id(d)
+        self.glyphs.setdefault(glyph_id, d)
+        return glyph_id
+
+    def update(self, glyphs: Mapping[str, str]):
+        self.glyphs.update(glyphs)
+
+    def url(self, glyph_id: str) -> str:
+        return f"{self.href}#{glyph_id}"
+
+    @property
+    def version(self) -> str:
+        """A hash of the set of glyphs."""
+        ids = "\n".join(sorted(self.glyphs))
+        return hashlib.sha1(ids.encode("utf-8")).hexdigest()[:10]
+
+    def to_svg(self) -> str:
+        paths = "".join(
+            f'<path id="{i}" d="{self.glyphs[i]}"/>' for i in sorted(self.glyphs)
+        )
+        return (
+            '<?xml version="1.0" ?><svg xmlns="http://www.w3.org/2000/svg">'
+            f"<defs>{paths}</defs></svg>"
+        )
+
+    def write(self, path: Optional[str] = None):
+        """Write the sprite file, to `path` or else to :attr:`href`."""
+        path = path or self.href
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path) or ".", suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(self.to_svg())
+        os.replace(tmp, path)
@@ -0,0 +1,96 @@
+from __future__ import annotations
+from xenopict import Xenopict
+from xenopict import accessor
+from concurrent.futures import ThreadPoolExecutor
+from rdkit import Chem
+import numpy as np
+import pandas as pd
+import pytest
+
+
+SMILES = ["CCC", "O=C(O)Cc1ccccc1Nc1c(Cl)cccc1Cl", "c1ccccc1", "CCC", None]
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    accessor.cache.clear()
+    yield
+    accessor.cache.clear()
+
+
+def test_series_render_dedups_and_caches():
+    s = pd.Series(SMILES, index=list("abcde"), name="smiles")
+
+    svg = s.xenopict.svg(processes=1, scale=30)
+    assert list(svg.index) == list("abcde") and svg.name == "smiles"
+    assert svg["a"] == svg["d"] == Xenopict("CCC", scale=30).to_svg()
+    assert pd.isna(svg["e"])
+    assert len(accessor.cache) == 3
+
+    # redisplay is served from the cache
+    misses = accessor.cache.misses
+    assert s.xenopict.svg(processes=1, scale=30).equals(svg)
+    assert accessor.cache.misses == misses
+
+    # other options and formats are cached separately
+    html = s.xenopict.html(processes=1)
+    assert html["c"] == Xenopict("c1ccccc1").to_html()
+    assert len(accessor.cache) == 6
+
+
+def test_class_options_are_part_of_the_key(monkeypatch):
+    s = pd.Series(["CCO"])
+    svg = s.xenopict.svg(processes=1)[0]
+    monkeypatch.setattr(Xenopict, "scale", 40)
+    assert s.xenopict.svg(processes=1)[0] == Xenopict("CCO").to_svg() != svg
+
+
+def test_series_render_pool():
+    s = pd.Series(["C" * n for n in range(1, 40)] * 2)
+    svg = s.xenopict.svg(processes=2, chunksize=4)
+    assert list(svg) == [Xenopict(x).to_svg() for x in s]
+
+
+def test_mols_and_depictions():
+    mols = [Chem.MolFromSmiles(s) for s in ["CCO", "OCC", "CCO"]]
+    s = pd.Series(mols + [Xenopict("CCN").shade([1, 0, -1]), np.nan])
+
+    html = s.xenopict.html(processes=1)
+    # atoms in another order are drawn separately
+    assert html[0] == html[2] != html[1]
+    assert html[3] == s[3].to_html()
+    assert np.isnan(html[4])
+    assert len(accessor.cache) == 2
+
+
+def test_frame_style_and_render():
+    df = pd.DataFrame(
+        {
+            "smiles": ["CCO", "c1ccccc1"],
+            "mol": [Chem.MolFromSmiles("CCN"), Chem.MolFromSmiles("CCC")],
+            "value": [1.5, 2.5],
+        }
+    )
+    assert df.xenopict._columns(None) == ["mol"]
+
+    styler = df.xenopict.style(["smiles", "mol"], processes=1)
+    out = styler.to_html()
+    for s in ["CCO", "c1ccccc1", "CCN", "CCC"]:
+        assert Xenopict(s).to_html() in out
+    assert "1.500000" in out
+
+    # displaying again does not render again
+    misses = accessor.cache.misses
+    assert styler.to_html() == out
+    assert accessor.cache.misses == misses
+
+    rendered = df.xenopict.render(format="svg", processes=1)
+    assert rendered["mol"][0] == Xenopict("CCN").to_svg()
+    assert rendered["smiles"][0] == "CCO"
+
+
+def test_render_with_executor():
+    s = pd.Series(SMILES[:3])
+    with ThreadPoolExecutor(2) as executor:
+        svg = s.xenopict.svg(processes=2, chunksize=1, executor=executor)
+    assert list(svg) == [Xenopict(x).to_svg() for x in SMILES[:3]]
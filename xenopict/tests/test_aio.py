@@ -0,0 +1,122 @@
+from __future__ import annotations
+from xenopict import Xenopict
+from xenopict import aio
+from xenopict.aio import AsyncRenderer
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import threading
+import time
+import pytest
+
+
+SMILES = ["CCC", "O=C(O)Cc1ccccc1Nc1c(Cl)cccc1Cl", "c1ccccc1", "CCN", "CC(=O)O"]
+
+
+class Slow(Xenopict):
+    """Draws slowly, recording how many drawings run at once."""
+
+    lock = threading.Lock()
+    running = 0
+    most = 0
+    drawn: list = []
+
+    def draw_mol(self, mol=None):
+        with Slow.lock:
+            Slow.running += 1
+            Slow.most = max(Slow.most, Slow.running)
+        time.sleep(0.05)
+        super().draw_mol(mol)
+        with Slow.lock:
+            Slow.running -= 1
+            Slow.drawn.append(self.mol.GetNumAtoms())
+
+    @classmethod
+    def reset(cls):
+        cls.running = cls.most = 0
+        cls.drawn = []
+
+
+def _run(coro):
+    return asyncio.run(coro)
+
+
+def test_render_matches_xenopict():
+    async def main():
+        async with AsyncRenderer(max_workers=2) as r:  # process pool
+            svg = await r.render(SMILES[1], [0.5] * 19)
+            html = await r.render("CCO", format="html", scale=30)
+            many = [s async for s in r.render_many(SMILES * 2, [[1, 0, -1]] + [None] * 9)]
+        return svg, html, many
+
+    svg, html, many = _run(main())
+    assert svg == Xenopict(SMILES[1]).shade([0.5] * 19).to_svg()
+    assert html == Xenopict("CCO", scale=30).to_html()
+    assert many == [Xenopict(SMILES[0]).shade([1, 0, -1]).to_svg()] + [
+        Xenopict(s).to_svg() for s in (SMILES * 2)[1:]
+    ]
+
+
+def test_bad_format():
+    with pytest.raises(ValueError):
+        _run(AsyncRenderer(use_processes=False).render("CCO", format="png"))
+
+
+def test_concurrency_is_bounded():
+    Slow.reset()
+
+    async def main():
+        with ThreadPoolExecutor(8) as executor:
+            r = AsyncRenderer(max_concurrency=2, executor=executor, xenopict_class=Slow)
+            return await asyncio.gather(*(r.render(s) for s in SMILES))
+
+    svgs = _run(main())
+    assert svgs == [Xenopict(s).to_svg() for s in SMILES]
+    assert Slow.most == 2
+
+
+def test_backpressure_and_cancellation():
+    Slow.reset()
+
+    async def main():
+        r = AsyncRenderer(
+            max_workers=1, max_concurrency=1, max_pending=1,
+            use_processes=False, xenopict_class=Slow,
+        )
+        first = asyncio.ensure_future(r.render("C"))
+        second = asyncio.ensure_future(r.render("CC"))
+        await asyncio.sleep(0.01)
+
+        # one drawing running, one waiting: no room for more
+        with pytest.raises(asyncio.QueueFull):
+            await r.render("CCC")
+
+        second.cancel()
+        await first
+        await asyncio.sleep(0.1)
+        await r.close()
+        return second
+
+    second = _run(main())
+    assert second.cancelled()
+    assert Slow.drawn == [1]  # the cancelled drawing never ran
+
+
+def test_arender_shared_renderer():
+    async def main():
+        try:
+            return await aio.arender("CCO", [1, 0, -1])
+        finally:
+            await aio.shutdown()
+
+    assert _run(main()) == Xenopict("CCO").shade([1, 0, -1]).to_svg()
+    assert aio._default is None
+
+
+def test_closed_renderer():
+    async def main():
+        r = AsyncRenderer(use_processes=False)
+        await r.close()
+        await r.render("CCO")
+
+    with pytest.raises(RuntimeError):
+        _run(main())
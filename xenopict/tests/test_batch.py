@@ -0,0 +1,51 @@
+from __future__ import annotations
+from xenopict import Xenopict
+from xenopict.batch import render_many
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+
+
+SMILES = ["CCC", "O=C(O)Cc1ccccc1Nc1c(Cl)cccc1Cl", "c1ccccc1", "CCN", "CC(=O)O"]
+
+
+def _serial(smiles, shadings=None):
+    out = []
+    for i, s in enumerate(smiles):
+        x = Xenopict(s)
+        if shadings and shadings[i] is not None:
+            x.shade(shadings[i])
+        out.append(x.to_svg())
+    return out
+
+
+def test_render_many_serial_matches_xenopict():
+    shadings = [[0.5, -0.5, 1.0], None, [0.1] * 6, None, None]
+    svgs = list(render_many(SMILES, shadings, processes=1))
+    assert svgs == _serial(SMILES, shadings)
+
+
+def test_render_many_pool_preserves_order():
+    svgs = list(render_many(iter(SMILES * 3), processes=2, chunksize=2))
+    assert svgs == _serial(SMILES * 3)
+
+
+def test_render_many_executor_and_options():
+    with ThreadPoolExecutor(2) as executor:
+        html = list(
+            Xenopict.render_many(SMILES, executor=executor, format="html", scale=30)
+        )
+
+    assert html == [Xenopict(s, scale=30).to_html() for s in SMILES]
+
+
+def test_render_many_bad_format():
+    with pytest.raises(ValueError):
+        list(render_many(SMILES, format="png"))
+
+
+@pytest.mark.parametrize("processes", [1, 2])
+def test_render_many_misaligned_shadings(processes):
+    with pytest.raises(ValueError, match="more molecules than atom shadings"):
+        list(render_many(SMILES, [[0.5, -0.5, 1.0]], processes=processes))
+    with pytest.raises(ValueError, match="more bond shadings than molecules"):
+        list(render_many(SMILES[:1], None, [None, None], processes=processes))
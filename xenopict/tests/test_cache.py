@@ -0,0 +1,69 @@
+from __future__ import annotations
+from xenopict import Xenopict
+from xenopict.cache import DepictionCache, depiction_key
+from rdkit import Chem
+
+
+def test_cache_hit_matches_fresh_depiction():
+    cache = DepictionCache()
+    smiles = "O=C(O)Cc1ccccc1Nc1c(Cl)cccc1Cl"
+
+    fresh = Xenopict(smiles).shade([0.5] * 19).to_svg()
+
+    Xenopict(smiles, cache=cache)
+    cached = Xenopict(smiles, cache=cache)
+    assert cache.hits == 1
+
+    assert cached.shade([0.5] * 19).to_svg() == fresh
+
+
+def test_cache_key_options():
+    cache = DepictionCache()
+    Xenopict("CCO", cache=cache)
+    Xenopict("CCO", cache=cache, scale=30)
+    Xenopict("CCO", cache=cache, add_atom_indices=True)
+    Xenopict("CCO", cache=cache, cmap="viridis")  # shading only, same depiction
+    assert (cache.hits, cache.misses) == (1, 3)
+
+    x = Xenopict("CCO")
+    assert depiction_key(x) == depiction_key(x, Chem.MolFromSmiles("CCO"))
+    assert depiction_key(x) != depiction_key(x, Chem.MolFromSmiles("OCC"))
+
+
+def test_cache_lru_bound():
+    cache = DepictionCache(maxsize=2)
+    for s in ["C", "CC", "CCC", "C"]:
+        Xenopict(s, cache=cache)
+    assert len(cache) == 2
+    assert cache.hits == 0
+
+
+def test_cache_directory(tmp_path):
+    Xenopict("c1ccccc1O", cache=DepictionCache(directory=str(tmp_path)))
+
+    cache = DepictionCache(directory=str(tmp_path))
+    x = Xenopict("c1ccccc1O", cache=cache)
+    assert cache.hits == 1
+    assert x.to_svg() == Xenopict("c1ccccc1O").to_svg()
+    assert len(list(tmp_path.glob("*.json"))) == 1
+
+
+def test_cache_key_drawn_props():
+    cache = DepictionCache()
+    mol = Chem.MolFromSmiles("CCO")
+    Xenopict(mol, cache=cache)
+    mol.GetAtomWithIdx(0).SetProp("atomNote", "x")
+    noted = Xenopict(mol, cache=cache)
+    assert (cache.hits, cache.misses) == (0, 2)
+    assert noted.to_svg() == Xenopict(mol).to_svg()
+
+
+def test_cache_threads():
+    from concurrent.futures import ThreadPoolExecutor
+
+    cache = DepictionCache(maxsize=4)
+    keys = [str(i % 10) for i in range(20000)]
+    with ThreadPoolExecutor(8) as pool:
+        list(pool.map(lambda k: cache.get(k) or cache.put(k, {}), keys))
+    assert len(cache) == 4
+    assert cache.hits + cache.misses == len(keys)
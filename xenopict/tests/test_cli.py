@@ -0,0 +1,107 @@
+from __future__ import annotations
+from xenopict import Xenopict
+from xenopict.cli import main
+from rdkit import Chem
+import os
+import zipfile
+import pytest
+
+
+SMILES = ["CCO ethanol", "c1ccccc1 benzene", "xyz bad", "CCN ethyl/amine"]
+
+
+@pytest.fixture
+def smi(tmp_path):
+    path = tmp_path / "in.smi"
+    path.write_text("\n".join(SMILES) + "\n")
+    return str(path)
+
+
+def test_smiles_to_directory_and_resume(smi, tmp_path, capsys):
+    out = tmp_path / "out"
+    assert main([smi, "-o", str(out), "--name-column", "1", "-j", "1"]) == 0
+    assert sorted(os.listdir(out)) == ["benzene.svg", "ethanol.svg", "ethyl_amine.svg"]
+    assert (out / "ethanol.svg").read_text() == Xenopict("CCO").to_svg()
+
+    err = capsys.readouterr().err
+    assert "skipping record 2 (bad)" in err
+    assert "3 rendered, 0 skipped, 1 failed" in err
+
+    # resumed runs skip what is already rendered
+    os.remove(out / "benzene.svg")
+    main([smi, "-o", str(out), "--name-column", "1", "-j", "1"])
+    assert "1 rendered, 2 skipped, 1 failed" in capsys.readouterr().err
+    assert (out / "benzene.svg").exists()
+
+    main([smi, "-o", str(out), "--name-column", "1", "-j", "1", "--overwrite", "-q"])
+    assert capsys.readouterr().err == ""
+
+
+def test_smiles_shading_and_options(tmp_path):
+    path = tmp_path / "in.csv"
+    path.write_text("smiles,id,charge\nCCO,a,1 0 -1\nCCN,b,1 0\nCCC,c,0.5 0.5 0.5\n")
+    out = tmp_path / "out"
+    args = ["--header", "--delimiter", ",", "--name-column", "id", "--shading-column", "charge"]
+    main([str(path), "-o", str(out), "-j", "2", "--format", "html", "--scale", "30"] + args)
+
+    assert sorted(os.listdir(out)) == ["a.html", "c.html"]  # b has the wrong number of values
+    expected = Xenopict("CCO", scale=30).shade([1, 0, -1]).to_html()
+    assert (out / "a.html").read_text() == expected
+
+
+def test_sdf_to_zip(tmp_path):
+    path = str(tmp_path / "in.sdf")
+    with Chem.SDWriter(path) as w:
+        for i, s in enumerate(["CCO", "c1ccccc1Cl", "CN"]):
+            mol = Chem.MolFromSmiles(s)
+            mol.SetProp("_Name", f"mol{i}")
+            mol.SetProp("shading", ",".join(["0.5"] * mol.GetNumAtoms()))
+            w.write(mol)
+
+    archive = str(tmp_path / "out.zip")
+    args = ["--name-column", "_Name", "--shading-column", "shading", "-j", "1", "-q"]
+    main([path, "-o", archive] + args)
+    main([path, "-o", archive] + args)  # resumed: nothing to add
+
+    with zipfile.ZipFile(archive) as z:
+        assert sorted(z.namelist()) == ["mol0.svg", "mol1.svg", "mol2.svg"]
+        svg = z.read("mol1.svg").decode()
+
+    mol = list(Chem.SDMolSupplier(path))[1]
+    assert svg == Xenopict(mol).shade([0.5] * 7).to_svg()
+
+
+@pytest.mark.parametrize("output", ["out", "out.zip"])
+def test_colliding_names(tmp_path, capsys, output):
+    path = tmp_path / "in.smi"
+    path.write_text("CCO a/b\nCCN a_b\nCCC a_b\nCCCC a_b-1\n")
+    out = str(tmp_path / output)
+    args = [str(path), "-o", out, "--name-column", "1", "-j", "1"]
+
+    main(args)
+    assert "4 rendered, 0 skipped" in capsys.readouterr().err
+    main(args)
+    assert "0 rendered, 4 skipped" in capsys.readouterr().err
+
+    if output.endswith(".zip"):
+        with zipfile.ZipFile(out) as z:
+            names = z.namelist()
+            svg = z.read("a_b-2.svg").decode()
+    else:
+        names = os.listdir(out)
+        svg = open(os.path.join(out, "a_b-2.svg")).read()
+    assert sorted(names) == ["a_b-1-3.svg", "a_b-1.svg", "a_b-2.svg", "a_b.svg"]
+    assert svg == Xenopict("CCC").to_svg()
+
+
+@pytest.mark.parametrize("processes", ["1", "2"])
+def test_drawing_failures_are_skipped(tmp_path, capsys, processes):
+    path = tmp_path / "in.smi"
+    path.write_text("CCO a\n[CH2]C b\nCCN c\n")  # b parses, but cannot be drawn
+    out = tmp_path / "out"
+    assert main([str(path), "-o", str(out), "--name-column", "1", "-j", processes]) == 0
+    assert sorted(os.listdir(out)) == ["a.svg", "c.svg"]
+
+    err = capsys.readouterr().err
+    assert "skipping record 1 (b): cannot be drawn" in err
+    assert "2 rendered, 0 skipped, 1 failed" in err
@@ -0,0 +1,69 @@
+from __future__ import annotations
+from xenopict import Xenopict
+from xenopict.dom import parse, BACKENDS
+import io
+import pickle
+import pytest
+
+
+SMILES = [
+    "CCC",
+    "O=C(O)Cc1ccccc1Nc1c(Cl)cccc1Cl",
+    "C[C@H](N)C(=O)N[C@@H](CC(C)C)C(=O)O",
+    "[NH4+].[O-]S(=O)(=O)c1ccccc1",
+]
+
+
+@pytest.mark.parametrize("smiles", SMILES)
+def test_backends_serialize_identically(smiles):
+    x = Xenopict(smiles)
+    y = Xenopict(smiles, dom_backend="etree")
+    assert x.to_svg() == y.to_svg()
+
+    for p in (x, y):
+        p.shade([0.5] * p.mol.GetNumAtoms())
+        p.mark_substructure([0, 1])
+        p.halo()
+
+    assert x.to_svg() == y.to_svg()
+
+
+def test_etree_parse_roundtrip():
+    x = Xenopict(SMILES[1], embed_script=True)
+    svg = x.to_svg(uniquify_internal_refs=False)
+    for backend in BACKENDS:
+        assert parse(svg, backend).toxml() == svg
+
+
+@pytest.mark.parametrize("backend", list(BACKENDS))
+def test_write_svg_matches_to_svg(backend):
+    x = Xenopict(SMILES[1], dom_backend=backend, embed_script=True)
+    x.shade([0.5, -0.5] * 9 + [0.1])
+
+    for kwargs in [{}, {"uniquify_internal_refs": False}, {"svg_attributes": {"a": 1}}]:
+        f = io.StringIO()
+        x.write_svg(f, **kwargs)
+        assert f.getvalue() == x.to_svg(**kwargs)
+
+        b = io.BytesIO()
+        x.write_svg(b, encoding="utf-8", **kwargs)
+        assert b.getvalue() == x.to_svg(**kwargs).encode("utf-8")
+
+
+def test_parse_entities_and_comments():
+    svg = "<?xml version='1.0'?>\n<svg xmlns='a' b=\"&lt;&#65;&#x42;\"><!-- c --><t>&amp; x</t></svg>"
+    for backend in BACKENDS:
+        assert parse(svg, backend).toxml() == parse(svg, "minidom").toxml()
+
+
+def test_etree_pickle_and_groups():
+    x = Xenopict("CCO", dom_backend="etree")
+    y = pickle.loads(pickle.dumps(x))
+    assert y.dom_backend == "etree"
+    assert set(y.groups) == {"shading", "mol_halo", "lines", "text", "overlay"}
+    assert x.to_svg() == y.to_svg()
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        Xenopict("CCO", dom_backend="nope")
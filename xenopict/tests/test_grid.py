@@ -0,0 +1,48 @@
+from __future__ import annotations
+from xenopict import Xenopict
+from xenopict.grid import Grid
+import re
+import pytest
+
+
+SMILES = ["O=C(O)Cc1ccccc1Nc1c(Cl)cccc1Cl", "Clc1ccncc1", "CCO", "c1ccccc1Cl"]
+
+
+@pytest.mark.parametrize("backend", ["minidom", "etree"])
+def test_grid_ids_unique_and_resolved(backend):
+    pictures = [Xenopict(s) for s in SMILES * 2]  # identical molecules too
+    pictures[0].shade([0.5] * 19).mark_substructure([1, 2])
+    pictures[1].mark_atoms([0])
+
+    svg = Grid(pictures, columns=3, dom_backend=backend).to_svg()
+
+    ids = re.findall(r' id="(.+?)"', svg)
+    hrefs = re.findall(r'href="#(.+?)"', svg)
+    assert len(ids) == len(set(ids))
+    assert set(hrefs) <= set(ids)
+    assert svg.count("<defs>") == 1
+    assert svg.count("<svg ") == len(pictures) + 1
+
+    # the pictures are not modified
+    assert pictures[2].to_svg() == Xenopict(SMILES[2]).to_svg()
+
+
+def test_grid_shares_symbols():
+    pictures = [Xenopict(s) for s in SMILES * 3]
+    svg = Grid(pictures).to_svg()
+
+    # each shape is stored once, so the grid is smaller than the pictures
+    assert len(svg) < sum(len(p.to_svg()) for p in pictures)
+    symbols = re.findall(r'<path id="[^"]+" d="([^"]+)"', svg)
+    assert len(symbols) == len(set(symbols))
+
+
+def test_grid_layout():
+    pictures = [Xenopict(s) for s in SMILES]
+    cells, (width, height) = Grid(pictures, columns=3, padding=5)._layout()
+
+    cw = max(w for _, _, w, _ in cells)
+    ch = max(h for _, _, _, h in cells)
+    assert width == pytest.approx(5 + 3 * (cw + 5))
+    assert height == pytest.approx(5 + 2 * (ch + 5))
+    assert cells[3][1] > cells[0][1]  # fourth picture starts the second row
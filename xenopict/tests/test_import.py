@@ -0,0 +1,56 @@
+from __future__ import annotations
+import subprocess
+import sys
+import pytest
+
+
+# Import-time budgets in milliseconds, about 5x what was measured when they
+# were recorded: ~13 ms for "import xenopict" (mostly reading the version
+# from git in a checkout), and ~25 ms of xenopict's own modules (excluding
+# numpy and rdkit) for "from xenopict import Xenopict".
+BUDGET_MS = {
+    "import xenopict": 65,
+    "from xenopict import Xenopict": 125,
+}
+
+# Loaded on first use, never at import.
+HEAVY = [
+    "matplotlib",
+    "colorcet",
+    "shapely",
+    "simplejson",
+    "rdkit.Chem.Draw",
+]
+
+
+def _importtime(statement: str) -> dict[str, tuple[int, int]]:
+    """Self and cumulative import time (microseconds) of each module imported by statement."""
+    out = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in out.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        if self_us.strip().isdigit():
+            times[name.strip()] = (int(self_us), int(cumulative_us))
+    return times
+
+
+@pytest.mark.parametrize("statement", list(BUDGET_MS))
+def test_import_time_budget(statement):
+    times = _importtime(statement)
+
+    assert not [m for m in times for h in HEAVY if m == h or m.startswith(h + ".")]
+
+    own_ms = sum(t[0] for m, t in times.items() if m.split(".")[0] == "xenopict") / 1000
+    assert own_ms < BUDGET_MS[statement]
+
+
+def test_colormap_needs_only_numpy():
+    times = _importtime("import xenopict.colormap")
+    assert not [m for m in times if m.split(".")[0] in ("rdkit", "matplotlib", "colorcet")]
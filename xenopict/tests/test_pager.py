@@ -0,0 +1,113 @@
+from __future__ import annotations
+from xenopict import Xenopict, magic
+from xenopict.pager import Pager
+import pytest
+
+
+class Counting(Xenopict):
+    drawn = 0
+
+    def to_html(self):
+        Counting.drawn += 1
+        return super().to_html()
+
+
+@pytest.fixture
+def pictures():
+    Counting.drawn = 0
+    return [Counting("C" * (n % 7 + 1)) for n in range(23)]
+
+
+def test_pager_draws_visible_page_once(pictures):
+    pager = Pager(pictures, page_size=10)
+    assert pager.pages == 3
+
+    html = pager._repr_html_()
+    assert Counting.drawn == 10
+    assert "Molecules 1-10 of 23 (page 1 of 3)" in html
+    assert html.count("border:solid") == 10
+
+    assert pager._repr_html_() == html
+    assert pager.next().next().next().page == 2
+    assert pager._repr_html_().count("border:solid") == 3
+    assert pager.previous().previous()._repr_html_() == html
+    assert Counting.drawn == 13
+
+    pager.clear()
+    pager._repr_html_()
+    assert Counting.drawn == 23
+
+
+def test_pager_last_page_follows_list(pictures):
+    pager = Pager(pictures, page_size=10).goto(2)
+    assert pager._repr_html_().count("border:solid") == 3
+    pictures.append(Counting("CCO"))
+    assert pager._repr_html_().count("border:solid") == 4
+
+
+def test_changed_depictions_are_drawn_again(pictures):
+    pager = Pager(pictures, page_size=10)
+    html = pager._repr_html_()
+    pictures[0].shade([0.5])
+    assert pager._repr_html_() != html
+    assert Counting.drawn == 20
+    assert pager._repr_html_() == pager._repr_html_()
+    assert Counting.drawn == 20
+
+    # short lists are drawn afresh each time they are shown, as they always were
+    short = pictures[:3]
+    html = magic._list_mol_html(short)
+    short[1].mark_atoms([0])
+    assert magic._list_mol_html(short) != html
+
+    long = pictures * 5
+    html = magic._list_mol_html(long)
+    long[0].mark_atoms([0])
+    assert magic._list_mol_html(long) != html
+
+
+def test_single_page_has_no_caption(pictures):
+    html = Pager(pictures[:5])._repr_html_()
+    assert html.startswith('<div style="display:flex')
+    assert html.count("border:solid") == 5
+
+
+def test_list_formatter_pages_long_lists(pictures):
+    long = pictures * 5
+    html = magic._list_mol_html(long)
+    assert "Molecules 1-50 of 115" in html
+    assert Counting.drawn == 50
+
+    # showing the same list again reuses the drawn page
+    assert magic._list_mol_html(long) == html
+    assert Counting.drawn == 50
+
+    with pytest.raises(NotImplementedError):
+        magic._list_mol_html([1, 2, 3])
+    assert magic._list_mol_html([]) == "[]"
+
+
+def test_list_formatter_shows_other_pages(pictures):
+    long = pictures * 5
+    assert "xenopict.magic.pager(list).next()" in magic._list_mol_html(long)
+    magic.pager(long).next()
+    assert "Molecules 51-100 of 115" in magic._list_mol_html(long)
+    assert "magic.pager" not in magic._list_mol_html(pictures[:3])
+
+    # short lists are left to the html formatter
+    with pytest.raises(NotImplementedError):
+        magic._list_mol_display(pictures[:3])
+    with pytest.raises(NotImplementedError):
+        magic._list_mol_display([1, 2, 3])
+
+
+def test_widget(pictures):
+    pytest.importorskip("ipywidgets")
+    pager = Pager(pictures, page_size=10)
+    box = pager.widget()
+    (back, label, forward), view = box.children[0].children, box.children[1]
+    assert back.disabled and label.value == pager.caption()
+
+    forward.click()
+    assert pager.page == 1 and not back.disabled
+    assert view.value == pager.page_html(1)
@@ -0,0 +1,34 @@
+from __future__ import annotations
+from xenopict.plotdot import PlotDot
+import numpy as np
+import pytest
+
+
+@pytest.mark.parametrize("levels", [1, 2, 4, 7])
+def test_dots_array_matches_dots(levels):
+    rng = np.random.default_rng(levels)
+    zs = np.concatenate([rng.uniform(-1, 1, 200), [0, 1, -1, 0.25, -0.5, 0.75]])
+    coords = rng.normal(size=(len(zs), 2))
+
+    p = PlotDot(levels)
+    expected = p(list(zs), coords)
+    dots = p.dots_array(zs, coords)
+
+    assert np.allclose(dots.radius, [d[0] for d in expected], rtol=0, atol=1e-12)
+    assert dots.color.tolist() == [d[1] for d in expected]
+    assert np.stack([dots.x, dots.y], axis=1).tolist() == [
+        list(d[2]) for d in expected
+    ]
+
+
+def test_sort_dots_array_is_stable():
+    p = PlotDot()
+    atoms = p.dots_array([0.5, -0.5], [[0, 0], [1, 1]], sort=False)
+    bonds = p.dots_array([0.5], [[2, 2]], sort=False)
+
+    dots = p.sort_dots_array(atoms, bonds)
+    expected = p([0.5, -0.5], [[0, 0], [1, 1]]) + p([0.5], [[2, 2]])
+    p._sort_dots(expected)
+
+    assert dots.x.tolist() == [d[2][0] for d in expected]
+    assert len(p.sort_dots_array().radius) == 0
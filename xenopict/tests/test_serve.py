@@ -0,0 +1,136 @@
+from __future__ import annotations
+from xenopict import Xenopict
+from xenopict.serve import DepictionServer, RenderService, RenderError, main
+from concurrent.futures import ThreadPoolExecutor
+from urllib.error import HTTPError
+from urllib.parse import quote
+from urllib.request import Request, urlopen
+import threading
+import time
+import pytest
+
+
+SMILES = "O=C(O)Cc1ccccc1Nc1c(Cl)cccc1Cl"
+
+
+class Slow(Xenopict):
+    def draw_mol(self, mol=None):
+        time.sleep(0.1)
+        super().draw_mol(mol)
+
+
+@pytest.fixture(scope="module")
+def server():
+    service = RenderService(workers=2, use_processes=False)
+    server = DepictionServer(("127.0.0.1", 0), service, quiet=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    service.close()
+
+
+def _get(server, path, headers={}):
+    host, port = server.server_address[:2]
+    request = Request(f"http://{host}:{port}{path}", headers=headers)
+    try:
+        with urlopen(request) as response:
+            return response.status, dict(response.headers), response.read().decode()
+    except HTTPError as e:
+        return e.code, dict(e.headers), e.read().decode()
+
+
+def test_svg_and_html(server):
+    shading = [0.5] * 19
+    query = f"smiles={quote(SMILES)}&shading={','.join(map(str, shading))}"
+    status, headers, svg = _get(server, f"/svg?{query}")
+    assert status == 200
+    assert headers["Content-Type"].startswith("image/svg+xml")
+    assert svg == Xenopict(SMILES).shade(shading).to_svg()
+
+    status, headers, html = _get(server, f"/html?smiles=CCO&scale=30")
+    assert status == 200 and html == Xenopict("CCO", scale=30).to_html()
+
+    assert _get(server, "/health")[::2] == (200, "ok")
+
+
+def test_etag_revalidation(server):
+    status, headers, svg = _get(server, "/svg?smiles=CCN")
+    etag = headers["ETag"]
+    assert etag.strip('"').split("-")[1] in svg  # the content hash of the ids
+
+    status, headers, body = _get(server, "/svg?smiles=CCN", {"If-None-Match": etag})
+    assert (status, body, headers["ETag"]) == (304, "", etag)
+    for header in [f'"svg-0", W/{etag}', "*"]:
+        assert _get(server, "/svg?smiles=CCN", {"If-None-Match": header})[0] == 304
+    assert _get(server, "/svg?smiles=CCN", {"If-None-Match": '"svg-0"'})[0] == 200
+
+    # the same molecule as html has another tag
+    assert _get(server, "/html?smiles=CCN")[1]["ETag"] != etag
+
+
+@pytest.mark.parametrize(
+    "path",
+    [
+        "/svg?smiles=xyz",
+        "/svg",
+        "/svg?smiles=CCO&shading=1,2",
+        "/svg?smiles=CCO&shading=a,b,c",
+        "/svg?smiles=CCO&color=red",
+        "/svg?smiles=CCO&add_atom_indices=maybe",
+        "/svg?smiles=CCO&cmap=no_such_map",
+        "/svg?smiles=CCO&bond_shading=1",
+    ],
+)
+def test_bad_requests(server, path):
+    status, _, message = _get(server, path)
+    assert status == 400 and message
+    assert _get(server, "/png?smiles=CCO")[0] == 404
+
+
+def test_bond_shading(server):
+    status, _, svg = _get(server, "/svg?smiles=CCO&bond_shading=0.5,-0.5")
+    assert status == 200 and "<svg" in svg
+    assert svg != _get(server, "/svg?smiles=CCO")[2]
+    status, _, svg = _get(server, "/svg?smiles=CCO&shading=1,0,-1&bond_shading=0.5,-0.5")
+    assert status == 200
+
+
+def test_cmap_names(server):
+    for cmap in ["xenosite_bwr_r", "viridis"]:
+        assert _get(server, f"/svg?smiles=CCO&shading=1,0,-1&cmap={cmap}")[0] == 200
+
+
+def test_identical_requests_are_coalesced():
+    service = RenderService(workers=4, use_processes=False, xenopict_class=Slow)
+    with ThreadPoolExecutor(8) as pool:
+        responses = list(pool.map(lambda _: service.render("CCO", [1, 0, -1]), range(8)))
+    service.close()
+
+    assert service.drawn == 1
+    assert len(set(responses)) == 1
+    assert responses[0][1] == Xenopict("CCO").shade([1, 0, -1]).to_svg()
+
+
+def test_overflow_and_errors():
+    service = RenderService(workers=1, max_pending=1, use_processes=False, xenopict_class=Slow)
+    with ThreadPoolExecutor(2) as pool:
+        first = pool.submit(service.render, "CCO")
+        time.sleep(0.02)
+        with pytest.raises(OverflowError):
+            service.render("CCN")
+        first.result()
+
+    with pytest.raises(RenderError):
+        service.render("CCO", format="png")
+    with pytest.raises(RenderError):
+        service.render("xyz")
+    assert len(service.cache) == 1
+    service.close()
+
+
+def test_main_help(capsys):
+    with pytest.raises(SystemExit):
+        main(["--help"])
+    assert "--workers" in capsys.readouterr().out
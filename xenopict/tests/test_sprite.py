@@ -0,0 +1,67 @@
+from __future__ import annotations
+from xenopict import Xenopict
+from xenopict.cache import DepictionCache
+from xenopict.grid import Grid
+from xenopict.sprite import GlyphSprite
+import re
+
+
+SMILES = ["O=C(O)Cc1ccccc1Nc1c(Cl)cccc1Cl", "Clc1ccncc1", "CC(=O)NCCS"]
+
+
+def _sprite_refs(svg: str, href: str) -> set[str]:
+    return set(re.findall(f'href="{re.escape(href)}#(.+?)"', svg))
+
+
+def test_glyphs_resolve_in_sprite(tmp_path):
+    sprite = GlyphSprite("glyphs.svg")
+    svgs = [Xenopict(s, glyph_sprite=sprite).to_svg() for s in SMILES]
+
+    refs = set().union(*(_sprite_refs(svg, sprite.href) for svg in svgs))
+    assert refs and refs == set(sprite.glyphs)
+
+    # external hrefs are not uniquified, internal ones still resolve
+    for svg in svgs:
+        ids = set(re.findall(r' id="(.+?)"', svg))
+        assert set(re.findall(r'href="#(.+?)"', svg)) <= ids
+
+    path = tmp_path / "glyphs.svg"
+    sprite.write(str(path))
+    written = path.read_text()
+    assert set(re.findall(r' id="(.+?)"', written)) == refs
+
+
+def test_sprite_shrinks_payload():
+    sprite = GlyphSprite()
+    for s in SMILES:
+        with_sprite = Xenopict(s, glyph_sprite=sprite).to_svg()
+        assert len(with_sprite) < len(Xenopict(s).to_svg())
+        assert "<text" not in with_sprite
+
+
+def test_sprite_is_stable():
+    a, b = GlyphSprite(), GlyphSprite()
+    Xenopict(SMILES[0], glyph_sprite=a)
+    version = a.version
+    Xenopict(SMILES[1], glyph_sprite=b)
+    Xenopict(SMILES[0], glyph_sprite=b)
+
+    # glyph ids only depend on shapes, so sprites only ever grow
+    assert set(a.glyphs) <= set(b.glyphs)
+    assert a.version == version != b.version
+
+
+def test_cached_depiction_registers_glyphs():
+    cache = DepictionCache()
+    Xenopict(SMILES[0], glyph_sprite=GlyphSprite(), cache=cache)
+
+    sprite = GlyphSprite()
+    svg = Xenopict(SMILES[0], glyph_sprite=sprite, cache=cache).to_svg()
+    assert cache.hits == 1
+    assert _sprite_refs(svg, sprite.href) == set(sprite.glyphs)
+
+
+def test_grid_keeps_sprite_refs():
+    sprite = GlyphSprite()
+    svg = Grid([Xenopict(s, glyph_sprite=sprite) for s in SMILES]).to_svg()
+    assert _sprite_refs(svg, sprite.href) == set(sprite.glyphs)
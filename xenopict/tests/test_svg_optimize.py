@@ -0,0 +1,164 @@
+from __future__ import annotations
+from xenopict import Xenopict
+from xenopict.drawer import _relative_path, _relative_paths, _poly_to_path, _optimize_svg
+from rdkit import Chem
+from rdkit.Chem.Draw import rdMolDraw2D
+import numpy as np
+import re
+import pytest
+
+
+CORPUS = [
+    "O=C(O)Cc1ccccc1Nc1c(Cl)cccc1Cl",
+    "C[C@H](N)C(=O)O",
+    "C/C=C/C",
+    "[CH2]C",
+    "[NH4+].[Cl-]",
+    "C1CC[C@@H]2CCCC[C@H]2C1",
+    "[2H]C([2H])([2H])O",
+    "c1ccc2[nH]ccc2c1",
+    "CS(=O)(=O)N",
+    "FC(F)(F)Br",
+    "OP(=O)(O)O",
+    "*CC*",
+    "C#N",
+    "CN1C=NC2=C1C(=O)N(C(=O)N2C)C",
+]
+
+
+def _reference_relative_path(D):
+    """The original, token-at-a-time implementation of _relative_path."""
+    xy: np.ndarray = np.array([0, 0])
+    D = iter(D.replace(",", " ").split())
+    out = ""
+    try:
+        while True:
+            d = next(D)
+            if d == "M":
+                out += "m"
+                xy1 = np.array([float(next(D)), float(next(D))])
+                delta = xy1 - xy
+                xy = xy1
+                out += "%.1f %.1f" % tuple(delta)
+                continue
+
+            if d == "Q":
+                out += "q"
+                xy1 = np.array([float(next(D)), float(next(D).strip(","))])
+                delta = xy1 - xy
+                out += "%.1f %.1f " % tuple(delta)
+
+                xy1 = np.array([float(next(D)), float(next(D))])
+                delta = xy1 - xy
+                xy = xy1
+                out += "%.1f %.1f" % tuple(delta)
+                continue
+
+            if d == "L":
+                out += "l"
+                xy1 = np.array([float(next(D)), float(next(D))])
+                delta = xy1 - xy
+                xy = xy1
+                out += "%.1f %.1f " % tuple(delta)
+                continue
+
+            if d == "Z":
+                out += "z"
+                continue
+
+            raise ValueError(d)
+
+    except StopIteration:
+        return f"m{out[1:]}".replace(".0", "").strip()
+
+
+def _rdkit_paths(smiles, scale=20):
+    d2d = rdMolDraw2D.MolDraw2DSVG(-1, -1)
+    dopt = d2d.drawOptions()
+    dopt.fixedBondLength = dopt.scalingFactor = scale
+    dopt.fixedScale = True
+    d2d.DrawMolecule(Chem.MolFromSmiles(smiles))
+    d2d.FinishDrawing()
+    return re.findall(r" d='([^']*)'", d2d.GetDrawingText())
+
+
+def _corpus():
+    for s in CORPUS:
+        for scale in (10, 20, 33):
+            yield from _rdkit_paths(s, scale)
+
+    x = Xenopict(CORPUS[0])
+    for atoms in ([0, 1, 2], [5, 6, 7, 8, 9, 10], list(range(19))):
+        shape = x._shapely_from_atoms(atoms).buffer(15, 6)
+        yield _poly_to_path(shape)
+
+
+def test_relative_path_matches_reference():
+    paths = list(_corpus())
+    assert len(paths) > 500
+    for d in paths:
+        assert _relative_path(d) == _reference_relative_path(d), d
+
+
+def test_relative_path_errors():
+    assert _relative_path("") == _reference_relative_path("")
+    with pytest.raises(ValueError):
+        _relative_path("M 0,0 C 1,1 2,2 3,3")
+
+
+def test_relative_paths_batch():
+    paths = list(_corpus())[:200] + ["", "M 1,1 Z", ""]
+    assert _relative_paths(paths) == [_reference_relative_path(d) for d in paths]
+    assert _relative_paths([]) == []
+
+
+@pytest.mark.parametrize("backend", ["minidom", "etree"])
+def test_optimize_stats_bytes_saved(backend):
+    x = Xenopict(CORPUS[0], optimize_svg=False, dom_backend=backend)
+    before = len(x.svgdom.toxml())
+
+    stats = _optimize_svg(x.svgdom)
+    assert stats.compressed == stats.paths > 0
+    assert stats.replaced > stats.symbols > 0
+    assert stats.bytes_saved == before - len(x.svgdom.toxml())
+
+    # a second pass finds nothing more to do
+    again = _optimize_svg(x.svgdom)
+    assert (again.compressed, again.replaced, again.bytes_saved) == (0, 0, 0)
+
+
+def test_optimize_shading_and_mark_layers():
+    x = Xenopict(CORPUS[0])
+    assert len(x.optimize_stats) == 1
+
+    # the two chlorines (atoms 13 and 18) are shaded and marked with identical shapes
+    x.shade_substructure([[13], [18]], [0.6, 0.6])
+    x.mark_substructure([13])
+    x.mark_substructure([18])
+    assert len(x.optimize_stats) == 4
+    assert sum(s.bytes_saved for s in x.optimize_stats[1:]) > 0
+
+    svg = x.to_svg(uniquify_internal_refs=False)
+    assert "<path d=\"M" not in svg
+    assert len(re.findall("<defs>", svg)) == 1
+    shading = x.groups["shading"].getElementsByTagName("use")
+    assert len(shading) == 2 * len(x.plot_dot.single_dot(0.6))
+    assert len(x.groups["mark"].getElementsByTagName("use")) == 2
+
+
+def test_optimize_only_new_layers():
+    x = Xenopict(CORPUS[0])
+    x.shade_substructure([[13], [18]], [0.6, 0.6])
+    for _ in range(3):
+        x.mark_substructure([13])
+    # each pass examines only the paths it added, yet matches them with earlier ones
+    assert [s.paths for s in x.optimize_stats[2:]] == [1, 1, 1]
+    assert [s.replaced for s in x.optimize_stats[2:]] == [0, 2, 1]
+
+    # the same document as one pass over everything at the end
+    y = Xenopict(CORPUS[0], optimize_svg=False)
+    y.shade_substructure([[13], [18]], [0.6, 0.6])
+    for _ in range(3):
+        y.mark_substructure([13])
+    _optimize_svg(y.svgdom)
+    assert x.to_svg().count("<use") == y.to_svg().count("<use")
@@ -0,0 +1,49 @@
+from __future__ import annotations
+from xenopict import Xenopict, timing
+import json
+import os
+import subprocess
+import sys
+
+
+def test_profile_phases():
+    with timing.profile() as p:
+        x = Xenopict("O=C(O)Cc1ccccc1Nc1c(Cl)cccc1Cl")
+        x.shade_substructure([[0, 1], [13]], [0.5, -0.5]).mark_substructure([1, 2])
+        x.to_html()
+
+    for phase in [
+        "draw_mol",
+        "draw_mol/layout",
+        "draw_mol/parse",
+        "draw_mol/restructure",
+        "draw_mol/optimize",
+        "draw_mol/reframe",
+        "shade_substructure/geometry",
+        "mark_substructure/optimize",
+        "to_html/to_svg/serialize",
+    ]:
+        assert p.calls(phase) == 1, phase
+    assert p.calls("shade_substructure/buffer") > 2
+    assert p.seconds("draw_mol") >= p.seconds("draw_mol/layout") > 0
+
+    assert "draw_mol/layout" in p.table()
+    assert json.loads(p.to_json())["draw_mol"]["calls"] == 1
+
+    # nothing is recorded outside of the block
+    Xenopict("CCO")
+    assert p.calls("draw_mol") == 1
+    assert timing.phase("x") is timing.phase("y")
+
+
+def test_profile_env_var():
+    code = "from xenopict import Xenopict; Xenopict('CCO').to_svg()"
+    out = subprocess.run(
+        [sys.executable, "-c", code],
+        env={**os.environ, "XENOPICT_PROFILE": "json"},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    stats = json.loads(out.stderr)
+    assert stats["draw_mol"]["calls"] == stats["to_svg/serialize"]["calls"] == 1
@@ -5,6 +5,7 @@ import pickle
 import re
 from rdkit import Chem
 import pytest
+import numpy as np
 
 
 def test_pandas_df_style():
@@ -53,6 +54,28 @@ def test_pickle_xenopict():
     assert x.to_svg() == pkx.to_svg()
 
 
+def test_unpickle_older_version():
+    x = Xenopict("O=C(O)Cc1ccccc1Nc1c(Cl)cccc1Cl")
+    state = x.__getstate__()
+    for key in ["optimize_stats", "_glyphs", "_adj_indptr", "_adj_indices", "_adj_bonds"]:
+        del state[key]  # not pickled before they were added
+
+    old = object.__new__(Xenopict)
+    old.__setstate__(state)
+    old.shade_substructure([[13], [18]], [0.6, 0.6]).mark_substructure([13])
+    assert len(old.optimize_stats) == 2
+
+
+def test_optimize_stats_are_bounded():
+    from xenopict.drawer import OPTIMIZE_STATS_KEPT
+
+    x = Xenopict("CCO")
+    for _ in range(OPTIMIZE_STATS_KEPT + 4):
+        x.mark_substructure([0, 1])
+    assert len(x.optimize_stats) == OPTIMIZE_STATS_KEPT
+    assert x.optimize_stats[-1].paths == 1
+
+
 def test_smarts_sanitization_failure():
     m = Chem.MolFromSmarts("c1cc([NH2])ccc1")
     Xenopict(m)
@@ -73,3 +96,183 @@ def test_clipping():
 
 def _get_ids_and_hrefs(svg: str) -> list[str]:
     return list(re.findall(r'href=".+?"|id=".+?"', svg))
+
+
+@pytest.mark.parametrize("backend", ["minidom", "etree"])
+def test_copy_clones_without_redrawing(backend):
+    x = Xenopict("O=C(O)Cc1ccccc1Nc1c(Cl)cccc1Cl", dom_backend=backend, scale=25)
+    x.mark_atoms([0])
+    base = x.to_svg()
+
+    y = x.copy()
+    assert y.scale == 25
+    assert y.to_svg() == base
+    assert y.groups.keys() == x.groups.keys()
+
+    # changes to the copy do not leak into the original
+    y.shade([0.5] * 19).mark_substructure([1, 2])
+    assert x.to_svg() == base
+    assert y.to_svg() != base
+
+    # and the copy behaves like a fresh drawing
+    z = Xenopict("O=C(O)Cc1ccccc1Nc1c(Cl)cccc1Cl", dom_backend=backend, scale=25)
+    z.mark_atoms([0]).shade([0.5] * 19).mark_substructure([1, 2])
+    assert y.to_svg() == z.to_svg()
+
+
+def test_adjacency_matches_rdkit():
+    x = Xenopict("O=C(O)Cc1ccccc1Nc1c(Cl)cccc1Cl")
+
+    for atom in x.mol.GetAtoms():
+        a = atom.GetIdx()
+        row = slice(x._adj_indptr[a], x._adj_indptr[a + 1])
+        neighbors = sorted(n.GetIdx() for n in atom.GetNeighbors())
+        assert x._adj_indices[row].tolist() == neighbors
+        for n, b in zip(x._adj_indices[row], x._adj_bonds[row]):
+            assert x.mol.GetBondBetweenAtoms(a, int(n)).GetIdx() == b
+
+    bonds = [(1, 3), (13, 12), (3, 4)]
+    assert x._bond_idx(bonds).tolist() == [
+        x.mol.GetBondBetweenAtoms(*b).GetIdx() for b in bonds
+    ]
+    with pytest.raises(ValueError):
+        x._bond_idx([(0, 5)])
+
+
+def test_shapely_from_atoms_twohop():
+    x = Xenopict("O=C(O)Cc1ccccc1Nc1c(Cl)cccc1Cl")
+
+    def segments(shape):
+        return {
+            tuple(sorted(map(tuple, g.coords)))
+            for g in shape.geoms
+            if g.geom_type == "LineString"
+        }
+
+    def expected(pairs):
+        return {tuple(sorted(map(tuple, x.coords[list(p)]))) for p in pairs}
+
+    # bonds 1-3, 3-4 and the two-hop pair 1-4; atom 0 is not bonded within atoms
+    shape = x._shapely_from_atoms([0, 1, 3, 4], [(1, 3), (3, 4)], twohop=True)
+    assert segments(shape) == expected([(1, 3), (3, 4), (1, 4)])
+    assert [tuple(g.coords)[0] for g in shape.geoms if g.geom_type == "Point"] == [
+        tuple(x.coords[0])
+    ]
+
+
+@pytest.mark.parametrize("cmap", ["xenosite", "xenosite_bwr_r", "viridis"])
+@pytest.mark.parametrize("diverging", [False, True])
+def test_color_lut_matches_matplotlib(cmap, diverging):
+    from matplotlib import colormaps
+
+    x = Xenopict("C", cmap=colormaps[cmap] if cmap == "viridis" else cmap)
+    x.diverging_cmap = diverging
+    values = np.concatenate([np.linspace(-1.2, 1.2, 301), [np.nan]])
+
+    mpl = x.get_cmap()
+    scaled = (values + 1.0) / 2 if diverging else values
+    assert np.array_equal(x.color_map(values), mpl(scaled), equal_nan=True)
+    assert x.color_map(float(values[7])) == mpl(float(scaled[7]))
+    assert x.color_styles(values) == [
+        "rgb(%g,%g,%g)" % tuple(int(c * 255) for c in mpl(v)[:3]) for v in scaled
+    ]
+
+
+def test_rendering_does_not_import_matplotlib():
+    import subprocess
+    import sys
+
+    code = (
+        "import sys\n"
+        "from xenopict import Xenopict\n"
+        "x = Xenopict('O=C(O)Cc1ccccc1Nc1c(Cl)cccc1Cl', cmap='xenosite_bwr_r')\n"
+        "x.shade([0.5] * 19).shade_substructure([[0, 1]], [-0.5]).to_svg()\n"
+        "Xenopict('CCO', cmap=[[1, 1, 1], [0, 0, 1]]).shade([1, 0, -1]).to_svg()\n"
+        "print(sorted({m.split('.')[0] for m in sys.modules} & {'matplotlib', 'colorcet'}))\n"
+    )
+    out = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    assert out.stdout.strip() == "[]"
+
+
+def test_rgb_list_cmap():
+    colors = [[1.0, 1.0, 1.0], [0.2, 0.4, 1.0], [0.0, 0.0, 0.5]]
+    x = Xenopict("CCO", cmap=colors).shade([1, 0.3, -1])
+    y = Xenopict("CCO", cmap=x.get_cmap()).shade([1, 0.3, -1])
+    assert x.to_svg() == y.to_svg()
+
+
+def test_lut_cache_is_bounded_and_keyed_by_content():
+    from matplotlib.colors import ListedColormap
+    from xenopict import colormap
+
+    first = colormap.get_lut([[1, 1, 1], [0, 0, 1]])
+    for i in range(2 * colormap._LUTS.maxsize):
+        colormap.get_lut([[1, 1, 1], [0, 0, i / 1000]])  # new lists, not new ids
+        colormap.get_lut(ListedColormap([[1, 1, 1], [0, 0, i / 1000]]))
+    assert len(colormap._LUTS) == colormap._LUTS.maxsize
+
+    again = colormap.get_lut([[1.0, 1.0, 1.0], [0.0, 0.0, 1.0]])
+    assert again is not first and np.array_equal(again.rgba, first.rgba)
+    assert colormap.get_lut([[1.0, 1.0, 1.0], [0.0, 0.0, 1.0]]) is again
+
+
+def test_colormaps_file_is_generated(tmp_path):
+    import os
+    import subprocess
+    import sys
+    from xenopict.colormap import COLORMAPS_FILE
+
+    script = os.path.join(os.path.dirname(COLORMAPS_FILE), os.pardir, "scripts", "make_colormaps.py")
+    if not os.path.exists(script):
+        pytest.skip("not a source checkout")
+
+    out = tmp_path / "colormaps.npz"
+    subprocess.run([sys.executable, script, str(out)], check=True)
+    with np.load(out) as made, np.load(COLORMAPS_FILE) as shipped:
+        assert made.files == shipped.files
+        assert all(np.array_equal(made[f], shipped[f]) for f in made.files)
+
+
+@pytest.mark.parametrize("backend", ["minidom", "etree"])
+def test_native_text(backend):
+    smiles = "O=C(O)Cc1ccccc1Nc1c(Cl)cccc1Cl"
+    x = Xenopict(smiles, native_text=True, dom_backend=backend)
+    svg = x.to_svg()
+    assert svg.count("<text") == len(re.findall(r"<text[^>]* class=\"atom-\d+\"", svg))
+    assert len(svg) < len(Xenopict(smiles).to_svg())
+
+    # labels are filtered with their atoms
+    labels = {a.GetIdx() for a in x.mol.GetAtoms() if a.GetSymbol() != "C"}
+    keep = [0, 1, 2]
+    svg = x.substructure_focus(keep).to_svg()
+    shown = {int(a) for a in re.findall(r"<text[^>]* class=\"atom-(\d+)\"", svg)}
+    assert shown == labels & set(keep)
+
+
+def test_rdkit_formatters_are_memoized(monkeypatch):
+    magic._renderings.clear()
+    mol = Chem.MolFromSmiles("O=C(O)Cc1ccccc1Nc1c(Cl)cccc1Cl")
+
+    html = magic._rdkit_repr_html(mol)
+    assert html == Xenopict(mol).to_html()
+    # atoms in another order are drawn separately
+    order = list(reversed(range(mol.GetNumAtoms())))
+    assert magic._rdkit_repr_html(Chem.RenumberAtoms(mol, order)) != html
+    assert magic._rdkit_repr_html(Chem.Mol(mol)) == html
+    assert magic._rdkit_repr_svg(mol) == Xenopict(mol).to_svg()
+    assert (magic._renderings.hits, len(magic._renderings)) == (1, 3)
+
+    # changing drawing options draws again
+    monkeypatch.setattr(Xenopict, "scale", 30)
+    assert magic._rdkit_repr_svg(mol) == Xenopict(mol).to_svg()
+    assert len(magic._renderings) == 4
+    assert magic._rdkit_repr_svg("CCO") == "CCO"
+
+    # so does setting drawn properties, like notes
+    svg = magic._rdkit_repr_svg(mol)
+    mol.GetAtomWithIdx(0).SetProp("atomNote", "x")
+    assert magic._rdkit_repr_svg(mol) != svg
+    mol.GetBondWithIdx(0).SetProp("bondNote", "y")
+    assert magic._rdkit_repr_svg(mol) == Xenopict(mol).to_svg()
@@ -0,0 +1,152 @@
+"""
+Opt-in timing of the phases of each :class:`.Xenopict` operation.
+
+Profiling is off by default, and then costs next to nothing. Turn it on for a
+block of code with :func:`profile`:
+
+>>> from xenopict import Xenopict
+>>> with profile() as p:
+...     svg = Xenopict("CCO").shade([1, 0, -1]).to_svg()
+>>> p.calls("draw_mol"), p.calls("draw_mol/layout"), p.calls("shade")
+(1, 1, 1)
+>>> print(p.table())  # doctest: +SKIP
+phase                               calls    total ms     mean ms
+draw_mol                                1        4.21        4.21
+draw_mol/layout                         1        1.80        1.80
+...
+
+or for a whole process by setting the ``XENOPICT_PROFILE`` environment
+variable, in which case the table (or json, with ``XENOPICT_PROFILE=json``)
+is written to stderr when the process exits.
+
+Phases nest: the time of ``draw_mol/parse`` is included in ``draw_mol``.
+"""
+from __future__ import annotations
+
+import atexit
+import contextlib
+import functools
+import json
+import os
+import sys
+import threading
+import time
+from typing import Callable, Iterator, Optional, TypeVar
+
+__all__ = ["Profile", "profile", "phase", "timed"]
+
+F = TypeVar("F", bound=Callable)
+
+
+class Profile:
+    """Wall time and call count of each phase."""
+
+    def __init__(self):
+        self.stats: dict[str, list] = {}  # phase -> [calls, seconds]
+        self._lock = threading.Lock()
+
+    def add(self, phase: str, seconds: float):
+        with self._lock:
+            stat = self.stats.setdefault(phase, [0, 0.0])
+            stat[0] += 1
+            stat[1] += seconds
+
+    def calls(self, phase: str) -> int:
+        return self.stats.get(phase, [0, 0.0])[0]
+
+    def seconds(self, phase: str) -> float:
+        return self.stats.get(phase, [0, 0.0])[1]
+
+    def reset(self):
+        with self._lock:
+            self.stats.clear()
+
+    def to_dict(self) -> dict[str, dict]:
+        return {
+            p: {"calls": calls, "seconds": seconds}
+            for p, (calls, seconds) in sorted(self.stats.items())
+        }
+
+    def to_json(self, **kwargs) -> str:
+        return json.dumps(self.to_dict(), **kwargs)
+
+    def table(self) -> str:
+        lines = [f"{'phase':<32}{'calls':>9}{'total ms':>12}{'mean ms':>12}"]
+        for p, (calls, seconds) in sorted(self.stats.items()):
+            ms = seconds * 1000
+            lines.append(f"{p:<32}{calls:>9}{ms:>12.2f}{ms / calls:>12.2f}")
+        return "\n".join(lines)
+
+
+_active: Optional[Profile] = None
+_local = threading.local()
+_NULL = contextlib.nullcontext()
+
+
+class _Phase:
+    __slots__ = ("profile", "name", "start")
+
+    def __init__(self, profile: Profile, name: str):
+        self.profile = profile
+        self.name = name
+
+    def __enter__(self):
+        stack = getattr(_local, "stack", None)
+        if stack is None:
+            stack = _local.stack = []
+        stack.append(self.name)
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.start
+        stack = _local.stack
+        self.profile.add("/".join(stack), elapsed)
+        stack.pop()
+
+
+def phase(name: str):
+    """
+    Context manager timing a phase, nested in the phases it runs within.
+    When profiling is off, a shared null context.
+    """
+    if _active is None:
+        return _NULL
+    return _Phase(_active, name)
+
+
+def timed(name: str) -> Callable[[F], F]:
+    """Decorator timing each call of a function as a phase."""
+
+    def decorate(f: F) -> F:
+        @functools.wraps(f)
+        def wrapper(*args, **kwargs):
+            if _active is None:
+                return f(*args, **kwargs)
+            with _Phase(_active, name):
+                return f(*args, **kwargs)
+
+        return wrapper  # type: ignore
+
+    return decorate
+
+
+@contextlib.contextmanager
+def profile(p: Optional[Profile] = None) -> Iterator[Profile]:
+    """Profile the phases run within the block (in all threads), into a new or given :class:`Profile`."""
+    global _active
+    previous, _active = _active, Profile() if p is None else p
+    try:
+        yield _active
+    finally:
+        _active = previous
+
+
+def _dump_at_exit(p: Profile, format: str):
+    sys.stderr.write((p.to_json(indent=1) if format == "json" else p.table()) + "\n")
+
+
+_PROFILE = os.environ.get("XENOPICT_PROFILE", False)
+
+if _PROFILE:
+    _active = Profile()
+    atexit.register(_dump_at_exit, _active, _PROFILE)